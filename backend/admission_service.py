@@ -0,0 +1,227 @@
+# backend/admission_service.py
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from typing import Deque, List, Optional
+
+from cachetools import TTLCache
+
+import metrics
+
+# --- Configuration ---
+IP_RATE_PER_MINUTE = float(os.getenv("CHAT_IP_RATE_PER_MINUTE", "10"))
+IP_BURST = float(os.getenv("CHAT_IP_BURST", "5"))
+API_KEY_RATE_PER_MINUTE = float(os.getenv("CHAT_API_KEY_RATE_PER_MINUTE", "60"))
+API_KEY_BURST = float(os.getenv("CHAT_API_KEY_BURST", "20"))
+MAX_CONCURRENT_STREAMS = int(os.getenv("CHAT_MAX_CONCURRENT", "8"))
+MAX_QUEUED_STREAMS = int(os.getenv("CHAT_MAX_QUEUE", "16"))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("CHAT_QUEUE_TIMEOUT", "10"))
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+# Proxies in front of the app that each append to X-Forwarded-For (e.g. 2 for a CDN plus Render's load balancer).
+# 0 ignores the header and uses the socket peer, for uvicorn --proxy-headers --forwarded-allow-ips setups.
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "1"))
+
+class RateLimitExceeded(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Too many requests ({reason}). Please try again in {math.ceil(retry_after)}s.")
+        self.reason = reason
+        self.retry_after = retry_after
+
+# --------------------------------------------------------------------------
+# ## Token buckets
+# --------------------------------------------------------------------------
+# A store's consume() returns 0 if a token was taken, otherwise the seconds until one is available.
+
+class InMemoryBucketStore:
+    """Per-process buckets. Idle buckets expire, so memory stays bounded under many distinct IPs."""
+
+    def __init__(self):
+        self._buckets = TTLCache(maxsize=100_000, ttl=3600)
+
+    async def consume(self, key: str, rate_per_second: float, capacity: float) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * rate_per_second)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        return (1 - tokens) / rate_per_second
+
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[2])
+local rate = tonumber(ARGV[1])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+class RedisBucketStore:
+    """
+    Buckets shared across workers and instances. Works with any client exposing an async
+    Redis-style `eval(script, numkeys, *keys_and_args)`, so tests can pass a local fake.
+    """
+
+    def __init__(self, client, prefix: str = "fpl:ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def consume(self, key: str, rate_per_second: float, capacity: float) -> float:
+        allowed, tokens = await self.client.eval(_TOKEN_BUCKET_LUA, 1, self.prefix + key, rate_per_second, capacity, time.time())
+        if int(allowed):
+            return 0.0
+        return (1 - float(tokens)) / rate_per_second
+
+def _create_bucket_store():
+    if not RATE_LIMIT_REDIS_URL:
+        return InMemoryBucketStore()
+    try:
+        import redis.asyncio as redis
+    except ImportError:
+        logging.error("RATE_LIMIT_REDIS_URL is set but the 'redis' package is not installed; using in-process rate limits.")
+        return InMemoryBucketStore()
+    return RedisBucketStore(redis.from_url(RATE_LIMIT_REDIS_URL))
+
+bucket_store = _create_bucket_store()
+
+def set_bucket_store(store):
+    """Swaps the bucket backend (e.g. for a fake Redis in tests)."""
+    global bucket_store
+    bucket_store = store
+
+async def check_rate_limits(client_ip: str, api_key: Optional[str] = None):
+    """Takes one token from the client's IP bucket and, if given, its API-key bucket."""
+    checks = [("ip", f"ip:{client_ip}", IP_RATE_PER_MINUTE, IP_BURST)]
+    if api_key:
+        checks.append(("api_key", f"key:{api_key}", API_KEY_RATE_PER_MINUTE, API_KEY_BURST))
+    for scope, key, rate_per_minute, burst in checks:
+        try:
+            retry_after = await bucket_store.consume(key, rate_per_minute / 60.0, burst)
+        except Exception as e:
+            # Fail open: a limiter outage should not take chat down with it
+            logging.error(f"❌ Rate limiter backend error: {e}")
+            return
+        if retry_after > 0:
+            metrics.CHAT_REJECTIONS.inc(reason=f"rate_limit_{scope}")
+            raise RateLimitExceeded(f"{scope} rate limit", retry_after)
+
+def client_ip(headers, client, trusted_hops: Optional[int] = None) -> str:
+    """
+    The address the outermost trusted proxy saw. Each trusted proxy appends one X-Forwarded-For hop,
+    so the client is `trusted_hops` from the right; anything further left is client-supplied and
+    could be forged to dodge the per-IP bucket.
+    """
+    trusted_hops = TRUSTED_PROXY_HOPS if trusted_hops is None else trusted_hops
+    forwarded = headers.get("x-forwarded-for")
+    if forwarded and trusted_hops > 0:
+        hops = [hop.strip() for hop in forwarded.split(",")]
+        return hops[max(0, len(hops) - trusted_hops)]
+    return client.host if client else "unknown"
+
+# --------------------------------------------------------------------------
+# ## Concurrency cap with a bounded wait queue
+# --------------------------------------------------------------------------
+
+class AdmissionSlot:
+    __slots__ = ('_controller', '_released')
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._released = False
+
+    def release(self):
+        """Idempotent, so both the stream's finally-block and the response's background task can call it."""
+        if not self._released:
+            self._released = True
+            self._controller._release()
+
+class AdmissionController:
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> AdmissionSlot:
+        """Returns a slot immediately, waits in the bounded queue, or raises RateLimitExceeded when it is full."""
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            return AdmissionSlot(self)
+        if len(self._waiters) >= self.max_queue:
+            metrics.CHAT_REJECTIONS.inc(reason="queue_full")
+            raise RateLimitExceeded("server busy", self.queue_timeout)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            # wait_for can time out after the slot was handed over (Python >= 3.12); pass it on, don't leak it
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            metrics.CHAT_REJECTIONS.inc(reason="queue_timeout")
+            raise RateLimitExceeded("server busy", self.queue_timeout)
+        except asyncio.CancelledError:
+            # The slot may have been handed over just as the client went away
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        # The releasing stream handed its slot straight to us; `active` is unchanged
+        return AdmissionSlot(self)
+
+    def _release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+chat_admission = AdmissionController(MAX_CONCURRENT_STREAMS, MAX_QUEUED_STREAMS, QUEUE_TIMEOUT_SECONDS)
+metrics.CHAT_QUEUE_DEPTH.set_function(lambda: chat_admission.queue_depth)
+metrics.CHAT_ACTIVE_STREAMS.set_function(lambda: chat_admission.active)
+
+# --------------------------------------------------------------------------
+# ## Answer cache
+# --------------------------------------------------------------------------
+# Cached answers hold no LLM connection, so they are served ahead of (and outside) the queue.
+
+_answer_cache = TTLCache(maxsize=2000, ttl=15 * 60)
+
+def answer_cache_key(question: str, history: List[dict], data_version: Optional[float]) -> Optional[tuple]:
+    """Only standalone questions are cacheable; the key changes whenever the snapshot is reloaded."""
+    if history:
+        return None
+    return (" ".join(question.lower().split()), data_version)
+
+def get_cached_answer(key: Optional[tuple]) -> Optional[str]:
+    if key is None:
+        return None
+    answer = _answer_cache.get(key)
+    metrics.CACHE_REQUESTS.inc(cache="chat_answer", result="hit" if answer is not None else "miss")
+    return answer
+
+def store_answer(key: Optional[tuple], answer: str):
+    if key is not None and answer:
+        _answer_cache[key] = answer
@@ -0,0 +1,220 @@
+"""
+Local benchmark suite for the data and recommendation hot paths.
+
+Generates a synthetic, season-scale bootstrap-static and fixtures payload (20 teams, ~700 players,
+380 fixtures including blanks and doubles) and times the snapshot transform, every context-builder
+intent, the chip_service functions and both DraftEngine strategies.
+
+Usage:
+    python benchmarks.py            # run and compare against the saved baseline (exit 1 on >10% regression)
+    python benchmarks.py --save     # run and record the results as the new baseline
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import chip_service
+import history_service
+import snapshot_service
+from context_service import build_context_for_question
+from draft_service import DraftEngine
+
+BASELINE_PATH = Path(__file__).parent / "benchmark_baseline.json"
+REGRESSION_THRESHOLD = 0.10
+
+TEAM_SHORT_NAMES = ['ARS', 'AVL', 'BOU', 'BRE', 'BHA', 'CHE', 'CRY', 'EVE', 'FUL', 'IPS',
+                    'LEI', 'LIV', 'MCI', 'MUN', 'NEW', 'NFO', 'SOU', 'TOT', 'WHU', 'WOL']
+PLAYERS_PER_TEAM = 35
+SQUAD_SHAPE = [(1, 4), (2, 12), (3, 12), (4, 7)]  # (element_type, count) per team
+CURRENT_GAMEWEEK = 10
+NAME_STARTS = ['Ab', 'Bel', 'Cor', 'Dan', 'Ed', 'Fer', 'Gar', 'Hal', 'Iv', 'Jor', 'Kel', 'Lon', 'Mar', 'Nor', 'Ol', 'Per', 'Rad', 'Sal', 'Tor', 'Ul', 'Vic', 'Wes']
+NAME_MIDDLES = ['', 'en', 'ov']
+NAME_ENDS = ['aro', 'berg', 'cini', 'dell', 'ez', 'ford', 'gan', 'hill', 'ini', 'kov', 'ley', 'mann', 'ni', 'son', 'tti', 'win']
+
+# --------------------------------------------------------------------------
+# ## Synthetic payloads
+# --------------------------------------------------------------------------
+
+def generate_bootstrap(rng: random.Random) -> dict:
+    teams = [{'id': i + 1, 'name': name, 'short_name': name,
+              'strength_overall_home': rng.randint(1000, 1350), 'strength_overall_away': rng.randint(1000, 1350)}
+             for i, name in enumerate(TEAM_SHORT_NAMES)]
+    element_types = [{'id': 1, 'singular_name_short': 'GKP'}, {'id': 2, 'singular_name_short': 'DEF'},
+                     {'id': 3, 'singular_name_short': 'MID'}, {'id': 4, 'singular_name_short': 'FWD'}]
+    events = [{'id': gw, 'is_current': gw == CURRENT_GAMEWEEK, 'is_next': gw == CURRENT_GAMEWEEK + 1,
+               'deadline_time': f"2025-{(gw // 4) % 12 + 1:02d}-{gw % 28 + 1:02d}T10:00:00Z"} for gw in range(1, 39)]
+
+    names = [start + middle + end for start in NAME_STARTS for middle in NAME_MIDDLES for end in NAME_ENDS]
+    rng.shuffle(names)
+    elements = []
+    for team in teams:
+        for element_type, count in SQUAD_SHAPE:
+            for _ in range(count):
+                player_id = len(elements) + 1
+                minutes = rng.randint(0, 900)
+                total_points = rng.randint(0, 120) if minutes else 0
+                elements.append({
+                    'id': player_id, 'web_name': names[player_id - 1], 'first_name': 'Synthetic', 'second_name': names[player_id - 1],
+                    'team': team['id'], 'team_code': team['id'] * 3, 'element_type': element_type,
+                    'now_cost': rng.randint(40, 145), 'cost_change_event': rng.choice([-1, 0, 0, 0, 1]),
+                    'total_points': total_points, 'event_points': rng.randint(0, 15), 'minutes': minutes,
+                    'goals_scored': rng.randint(0, 12), 'assists': rng.randint(0, 8), 'clean_sheets': rng.randint(0, 5),
+                    'bonus': rng.randint(0, 15), 'bps': rng.randint(0, 300), 'saves': rng.randint(0, 40) if element_type == 1 else 0,
+                    'form': f"{rng.uniform(0, 10):.1f}", 'points_per_game': f"{rng.uniform(0, 8):.1f}",
+                    'selected_by_percent': f"{rng.uniform(0, 60):.1f}", 'ict_index': f"{rng.uniform(0, 150):.1f}",
+                    'influence': f"{rng.uniform(0, 400):.1f}", 'creativity': f"{rng.uniform(0, 400):.1f}", 'threat': f"{rng.uniform(0, 400):.1f}",
+                    'expected_goals': f"{rng.uniform(0, 10):.2f}", 'expected_assists': f"{rng.uniform(0, 6):.2f}",
+                    'status': rng.choice(['a', 'a', 'a', 'a', 'd', 'i', 's']), 'news': '',
+                    'chance_of_playing_next_round': rng.choice([None, 0, 25, 50, 75, 100]),
+                    'transfers_in_event': rng.randint(0, 500_000), 'transfers_out_event': rng.randint(0, 500_000),
+                })
+    return {'teams': teams, 'element_types': element_types, 'events': events, 'elements': elements}
+
+def generate_fixtures(rng: random.Random) -> list:
+    """Double round-robin (380 fixtures) with a few postponements rescheduled into doubles."""
+    team_ids = list(range(1, len(TEAM_SHORT_NAMES) + 1))
+    rounds = []
+    rotation = team_ids[:]
+    for _ in range(len(team_ids) - 1):
+        half = len(rotation) // 2
+        rounds.append(list(zip(rotation[:half], reversed(rotation[half:]))))
+        rotation = [rotation[0]] + [rotation[-1]] + rotation[1:-1]
+    rounds += [[(away, home) for home, away in fixtures] for fixtures in rounds]
+
+    fixtures = []
+    for gw, pairs in enumerate(rounds, start=1):
+        for home, away in pairs:
+            fixtures.append({'id': len(fixtures) + 1, 'event': gw, 'team_h': home, 'team_a': away,
+                             'team_h_difficulty': rng.randint(2, 5), 'team_a_difficulty': rng.randint(2, 5)})
+
+    # Blank gameweeks: postpone a handful of fixtures; rearrange most of them into double gameweeks
+    postponed = rng.sample([f for f in fixtures if 15 <= f['event'] <= 30], 12)
+    for i, fixture in enumerate(postponed):
+        fixture['event'] = None if i % 4 == 0 else rng.choice([25, 34, 36])
+    return fixtures
+
+def build_uncompacted_snapshot(bootstrap_data: dict, fixtures_data: list, current_gameweek_id: int) -> pd.DataFrame:
+    """
+    The player table as it was built before the compact snapshot: every element column with default
+    dtypes and a separate fixture list per player. Kept only as the "before" of the memory comparison.
+    """
+    teams_map = {team['id']: team['short_name'] for team in bootstrap_data.get('teams', [])}
+    position_map = {p_type['id']: p_type['singular_name_short'] for p_type in bootstrap_data.get('element_types', [])}
+    team_fixtures = {team['id']: [] for team in bootstrap_data.get('teams', [])}
+    for fixture in fixtures_data:
+        if fixture.get('event') and fixture['event'] >= current_gameweek_id:
+            team_fixtures[fixture['team_h']].append({'gameweek': fixture['event'], 'opponent': teams_map.get(fixture['team_a'], 'N/A'), 'difficulty': fixture['team_h_difficulty'], 'is_home': True})
+            team_fixtures[fixture['team_a']].append({'gameweek': fixture['event'], 'opponent': teams_map.get(fixture['team_h'], 'N/A'), 'difficulty': fixture['team_a_difficulty'], 'is_home': False})
+
+    df = pd.DataFrame(bootstrap_data.get('elements', [])).rename(columns={'web_name': 'Player'})
+    df['team_name'] = df['team'].map(teams_map)
+    df['position'] = df['element_type'].map(position_map)
+    df['simple_name'] = df['Player'].str.lower().str.replace(r'[^a-z0-9\s]', '', regex=True).str.strip()
+    df['form'] = pd.to_numeric(df['form'], errors='coerce').fillna(0)
+    df['points_per_game'] = pd.to_numeric(df['points_per_game'], errors='coerce').fillna(0)
+    df['fixture_details'] = df['team'].map(lambda x: sorted(team_fixtures.get(x, []), key=lambda f: f['gameweek']))
+    return df.drop_duplicates(subset=['id'], keep='first').set_index('Player')
+
+# --------------------------------------------------------------------------
+# ## Runner
+# --------------------------------------------------------------------------
+
+def _time(function, repeat: int) -> float:
+    """Returns the median wall time in seconds over `repeat` runs, after one warm-up call."""
+    function()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def run_benchmarks(repeat: int) -> dict:
+    rng = random.Random(2025)
+    bootstrap_data = generate_bootstrap(rng)
+    fixtures_data = generate_fixtures(rng)
+    snapshot = snapshot_service.build_player_snapshot(bootstrap_data, fixtures_data, CURRENT_GAMEWEEK)
+    teams_data = bootstrap_data['teams']
+    players_by_id = snapshot_service.build_players_by_id(snapshot)
+    lookup_name = snapshot.index[0]
+
+    cases = {
+        "snapshot.build_player_snapshot": lambda: snapshot_service.build_player_snapshot(bootstrap_data, fixtures_data, CURRENT_GAMEWEEK),
+        "snapshot.build_players_by_id": lambda: snapshot_service.build_players_by_id(snapshot),
+        "context.transfer_search": lambda: build_context_for_question("Which midfielder should I buy for 8.5m?", snapshot),
+        "context.best_value": lambda: build_context_for_question("Who are the most undervalued players?", snapshot),
+        "context.player_lookup": lambda: build_context_for_question(f"Is {lookup_name} worth keeping?", snapshot, players_by_id),
+        "context.no_match": lambda: build_context_for_question("What time does the deadline close?", snapshot, players_by_id),
+        "chip.simple_fixture_difficulty": lambda: chip_service.get_fixture_difficulty_for_next_n_gameweeks(snapshot, CURRENT_GAMEWEEK),
+        "chip.adjusted_fixture_difficulty": lambda: chip_service.get_adjusted_fixture_difficulty(snapshot, teams_data, CURRENT_GAMEWEEK),
+        "chip.chip_recommendations": lambda: chip_service.calculate_chip_recommendations_new(snapshot, CURRENT_GAMEWEEK),
+        "draft.balanced": lambda: DraftEngine(snapshot).create_draft('balanced'),
+        "draft.stars_and_scrubs": lambda: DraftEngine(snapshot).create_draft('stars_and_scrubs'),
+    }
+
+    # The history file is optional (see history_service); skip its cases rather than fail the run
+    history = history_service.get_historical_stats()
+    if history is not None and history.names:
+        history_row = history.row_for("Mohamed Salah")
+        if history_row is None:
+            history_row = 0
+        cases.update({
+            "history.load": lambda: history_service.HistoricalStats(json.loads(history_service.HISTORY_PATH.read_text(encoding='utf-8'))),
+            "history.describe": lambda: history.describe(history_row),
+            "context.past_season_leaders": lambda: build_context_for_question("Who had the best points per 90 last season?", snapshot, players_by_id),
+        })
+    else:
+        print("⚠️ Historical stats unavailable, skipping history cases.\n")
+
+    raw_bytes = int(pd.DataFrame(bootstrap_data['elements']).memory_usage(deep=True).sum())
+    uncompacted_bytes = snapshot_service.snapshot_memory_bytes(build_uncompacted_snapshot(bootstrap_data, fixtures_data, CURRENT_GAMEWEEK))
+    snapshot_bytes = snapshot_service.snapshot_memory_bytes(snapshot)
+    print(f"{'memory.raw_elements_frame':<40} {raw_bytes / 1e6:>10.3f} MB")
+    print(f"{'memory.uncompacted_snapshot':<40} {uncompacted_bytes / 1e6:>10.3f} MB")
+    print(f"{'memory.player_snapshot':<40} {snapshot_bytes / 1e6:>10.3f} MB\n")
+
+    results = {}
+    for name, function in cases.items():
+        results[name] = _time(function, repeat)
+        print(f"{name:<40} {results[name] * 1000:>10.3f} ms")
+    return results
+
+def compare_to_baseline(results: dict, baseline: dict) -> list:
+    """Returns a description of every case that is more than REGRESSION_THRESHOLD slower than its baseline."""
+    regressions = []
+    for name, seconds in results.items():
+        previous = baseline.get(name)
+        if previous and seconds > previous * (1 + REGRESSION_THRESHOLD):
+            regressions.append(f"{name}: {previous * 1000:.3f} ms -> {seconds * 1000:.3f} ms (+{(seconds / previous - 1) * 100:.1f}%)")
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--save', action='store_true', help="Store the results as the new baseline.")
+    parser.add_argument('--repeat', type=int, default=20, help="Timed runs per case (median is reported).")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.repeat)
+
+    if args.save:
+        BASELINE_PATH.write_text(json.dumps(results, indent=2, sort_keys=True))
+        print(f"\n✅ Baseline saved to '{BASELINE_PATH.name}'.")
+        sys.exit(0)
+
+    if not BASELINE_PATH.exists():
+        print("\nNo baseline found. Run `python benchmarks.py --save` to record one.")
+        sys.exit(0)
+
+    regressions = compare_to_baseline(results, json.loads(BASELINE_PATH.read_text()))
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) regressed by more than {REGRESSION_THRESHOLD:.0%}:")
+        for line in regressions:
+            print(f"- {line}")
+        sys.exit(1)
+    print("\n✅ No regressions against baseline.")
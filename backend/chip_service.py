@@ -2,6 +2,8 @@ import pandas as pd
 import logging
 from pprint import pprint
 
+import metrics
+
 # --- Set up basic logging ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -9,6 +11,7 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 # ## Feature 1: Simple Fixture Difficulty (Original)
 # --------------------------------------------------------------------------
 
+@metrics.timed
 def get_fixture_difficulty_for_next_n_gameweeks(master_fpl_data: pd.DataFrame, current_gameweek: int, n: int = 5) -> list:
     """
     Calculates and ranks team fixture difficulty based only on the next 'n' upcoming gameweeks.
@@ -44,6 +47,7 @@ def get_fixture_difficulty_for_next_n_gameweeks(master_fpl_data: pd.DataFrame, c
 # ## Feature 2: Strength-Adjusted Fixture Difficulty (Advanced)
 # --------------------------------------------------------------------------
 
+@metrics.timed
 def get_adjusted_fixture_difficulty(master_fpl_data: pd.DataFrame, teams_data: list, current_gameweek: int, n: int = 5) -> list:
     """
     Calculates a "strength-adjusted" fixture difficulty.
@@ -102,6 +106,7 @@ def get_adjusted_fixture_difficulty(master_fpl_data: pd.DataFrame, teams_data: l
 # ## Feature 3: Chip Recommendations (Corrected)
 # --------------------------------------------------------------------------
 
+@metrics.timed
 def calculate_chip_recommendations_new(master_fpl_data: pd.DataFrame, current_gameweek: int) -> dict:
     """
     Analyzes fixture data to recommend opportune moments for using chips,
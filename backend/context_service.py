@@ -0,0 +1,83 @@
+# backend/context_service.py
+import re
+from typing import Dict, Optional
+
+import pandas as pd
+
+import metrics
+from history_service import get_historical_stats
+from snapshot_service import PlayerRecord, build_players_by_id
+
+@metrics.timed
+def build_context_for_question(question: str, all_players_df: pd.DataFrame, players_by_id: Optional[Dict[int, PlayerRecord]] = None) -> str:
+    if all_players_df is None: return ""
+    question_lower = question.lower()
+    
+    # Intent 1: Transfer Search
+    transfer_triggers = ['buy', 'get', 'transfer', 'replace', 'midfielder', 'forward', 'defender']
+    budget_match = re.search(r'(\d{1,2}(\.\d{1,2})?)m', question_lower)
+    if any(trigger in question_lower for trigger in transfer_triggers) and budget_match:
+        budget = float(budget_match.group(1)) * 10
+        position = ""
+        if 'midfielder' in question_lower: position = 'MID'
+        elif 'forward' in question_lower: position = 'FWD'
+        elif 'defender' in question_lower: position = 'DEF'
+        mask = all_players_df['now_cost'] <= budget
+        if position: mask &= all_players_df['position'] == position
+        df_filtered = all_players_df[mask].copy()
+        df_filtered['score'] = df_filtered['form'] * 1.5 + df_filtered['ict_index'] * 1.0 + df_filtered['points_per_game'] * 1.2
+        top_candidates = df_filtered.sort_values(by='score', ascending=False).head(5)
+        if not top_candidates.empty:
+            context = f"Top transfer candidates (Position: {position or 'Any'}, Budget: £{budget/10.0:.1f}m):\n"
+            for name, player in top_candidates.iterrows():
+                fixtures = ", ".join([f"{f['opponent']}({'H' if f['is_home'] else 'A'})" for f in player.get('fixture_details', [])[:5]])
+                context += f"- {name} ({player.get('team_name')}, £{player.get('now_cost',0)/10.0:.1f}m): Form: {player.get('form',0):.1f}, Fixtures: {fixtures}\n"
+            return context
+
+    # Intent 2: Best Value Search
+    value_triggers = ['value', 'undervalued', 'points per million']
+    if any(trigger in question_lower for trigger in value_triggers):
+        df_value = all_players_df[all_players_df['total_points'] > 50].copy()
+        if not df_value.empty:
+            df_value['points_per_million'] = df_value['total_points'] / (df_value['now_cost'] / 10.0)
+            top_value_players = df_value.sort_values(by='points_per_million', ascending=False).head(10)
+            context = "Top 10 best value players (>50 total points):\n"
+            for name, player in top_value_players.iterrows():
+                context += f"- {name} ({player.get('team_name')}, £{player.get('now_cost',0)/10.0:.1f}m): {player.get('points_per_million', 0):.2f} PPM\n"
+            return context
+
+    # Intent 3: Specific Player Lookup
+    if players_by_id is None:
+        players_by_id = build_players_by_id(all_players_df)
+    cleaned_question = re.sub(r"['’]s\b", "", question_lower)
+    players_found = {}
+    for record in players_by_id.values():
+        if record.simple_name in cleaned_question:
+            players_found.setdefault(record.name, record)
+    if players_found:
+        history = get_historical_stats()
+        context = "Player Data:\n"
+        for name in sorted(players_found):
+            player = players_found[name]
+            fixtures = ", ".join([f"{f['opponent']}({'H' if f['is_home'] else 'A'})" for f in player.fixture_details[:5]])
+            context += f"- {name} ({player.team_name}, £{player.now_cost/10.0:.1f}m): Points: {player.total_points}, Form: {player.form}, Fixtures: {fixtures}\n"
+            history_row = history.row_for(player.full_name, player.name) if history else None
+            if history_row is not None:
+                context += f"  Past seasons: {history.describe(history_row)}\n"
+        return context
+
+    # Intent 4: Past Season Leaders
+    history_triggers = ['last season', 'past season', 'previous season', 'per 90']
+    if any(trigger in question_lower for trigger in history_triggers):
+        history = get_historical_stats()
+        if history is not None and history.seasons:
+            if 'per 90' in question_lower: metric, label, value_format = 'points_per_90', 'points per 90', "{:.2f} pts/90"
+            elif 'improved' in question_lower or 'improvement' in question_lower: metric, label, value_format = 'points_change', 'points gained', "{:+.0f} pts vs prior season"
+            else: metric, label, value_format = 'points_per_million', 'points per million', "{:.1f} pts/£m"
+            leaders = history.top_players(metric)
+            if leaders:
+                context = f"Top {len(leaders)} players by {label} ({leaders[0]['season']}):\n"
+                for leader in leaders:
+                    context += f"- {leader['name']}: {value_format.format(leader[metric])}\n"
+                return context
+    return ""
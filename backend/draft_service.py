@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+import metrics
+
 class DraftEngine:
     def __init__(self, all_players_df: pd.DataFrame):
         self.players_df = all_players_df.copy()
@@ -12,8 +14,6 @@ class DraftEngine:
 
     def _calculate_value(self):
         """Calculates an intelligent value score for each player."""
-        self.players_df['ict_index'] = pd.to_numeric(self.players_df['ict_index'], errors='coerce').fillna(0)
-        self.players_df['now_cost'] = pd.to_numeric(self.players_df['now_cost'], errors='coerce').fillna(0)
         cost = (self.players_df['now_cost'] / 10.0).replace(0, np.inf)
         self.players_df['value'] = (self.players_df['ict_index']**2) / cost
         self.players_df.sort_values(by='value', ascending=False, inplace=True)
@@ -80,6 +80,7 @@ class DraftEngine:
         self._fill_remaining_slots(position_targets)
         return pd.DataFrame(self.squad_data)
 
+    @metrics.timed
     def create_draft(self, strategy: str = 'balanced') -> pd.DataFrame:
         """The main method to generate a full 15-man squad based on a strategy."""
         self._calculate_value()
@@ -0,0 +1,34 @@
+# backend/fpl_client.py
+import httpx
+from typing import Optional
+
+import metrics
+
+# Headers to mimic a browser request
+API_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+# --- Shared Connection Pool ---
+# One keep-alive pool per worker, reused by every request that talks to the FPL API.
+_client: Optional[httpx.AsyncClient] = None
+
+def get_client() -> httpx.AsyncClient:
+    """Returns the shared pooled HTTP client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            headers=API_HEADERS,
+            timeout=httpx.Timeout(10.0, connect=5.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            http2=True,
+            event_hooks={'request': [metrics.on_upstream_request], 'response': [metrics.on_upstream_response]},
+        )
+    return _client
+
+async def close_client():
+    """Closes the shared client. Called on app shutdown."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
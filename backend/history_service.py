@@ -0,0 +1,107 @@
+# backend/history_service.py
+import json
+import logging
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+HISTORY_PATH = Path(__file__).parent / "fpl_data" / "processed_player_data.json"
+STAT_FIELDS = ('cost', 'total_points', 'goals_scored', 'assists', 'minutes_played')
+# Seasons with fewer minutes than this are too small a sample for per-90 rates
+MIN_MINUTES_FOR_RATES = 450
+
+def normalize_name(name: str) -> str:
+    """Lowercases and strips accents so 'Martin Ødegaard' and 'Martin Odegaard' share a key."""
+    decomposed = unicodedata.normalize('NFKD', name.replace('Ø', 'O').replace('ø', 'o'))
+    return " ".join(decomposed.encode('ascii', 'ignore').decode().lower().split())
+
+class HistoricalStats:
+    """
+    Columnar season-by-player store over processed_player_data.json.
+    Each stat is a (players x seasons) float32 array with NaN where a player has no data for a season;
+    derived rates are computed once for the whole table with vectorized operations.
+    """
+
+    def __init__(self, raw: Dict[str, Dict[str, dict]]):
+        # The source spells some players with and without accents in different seasons
+        # ('Seamus Coleman' / 'Séamus Coleman'); merge them into one row per normalized name,
+        # shown under the spelling of their most recent season.
+        merged: Dict[str, Dict[str, dict]] = {}
+        display_names: Dict[str, str] = {}
+        latest_season: Dict[str, str] = {}
+        for name, seasons in raw.items():
+            key = normalize_name(name)
+            merged.setdefault(key, {}).update(seasons)
+            newest = max(seasons, default='')
+            if key not in display_names or newest >= latest_season[key]:
+                display_names[key], latest_season[key] = name, newest
+
+        self.names: List[str] = [display_names[key] for key in merged]
+        self.seasons: List[str] = sorted({season for seasons in merged.values() for season in seasons})
+        self.row_by_name: Dict[str, int] = {key: row for row, key in enumerate(merged)}
+
+        season_col = {season: col for col, season in enumerate(self.seasons)}
+        shape = (len(self.names), len(self.seasons))
+        self.stats: Dict[str, np.ndarray] = {field: np.full(shape, np.nan, dtype=np.float32) for field in STAT_FIELDS}
+        for row, seasons in enumerate(merged.values()):
+            for season, values in seasons.items():
+                for field in STAT_FIELDS:
+                    self.stats[field][row, season_col[season]] = values.get(field, np.nan)
+
+        cost, points, minutes = self.stats['cost'], self.stats['total_points'], self.stats['minutes_played']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.points_per_90 = np.where(minutes >= MIN_MINUTES_FOR_RATES, points / minutes * 90, np.nan)
+            self.points_per_million = np.where(cost > 0, points / cost, np.nan)
+        # Season-over-season change, aligned with the later season (first column is always NaN)
+        self.points_change = np.full(shape, np.nan, dtype=np.float32)
+        self.points_change[:, 1:] = points[:, 1:] - points[:, :-1]
+        self.cost_change = np.full(shape, np.nan, dtype=np.float32)
+        self.cost_change[:, 1:] = cost[:, 1:] - cost[:, :-1]
+
+    def row_for(self, *names: str) -> Optional[int]:
+        """Returns the row for the first name that matches, or None."""
+        for name in names:
+            if name:
+                row = self.row_by_name.get(normalize_name(name))
+                if row is not None:
+                    return row
+        return None
+
+    def top_players(self, metric: str, season: Optional[str] = None, n: int = 10) -> List[dict]:
+        """Ranks players on 'points_per_90', 'points_per_million' or 'points_change' for a season (default: latest)."""
+        col = self.seasons.index(season) if season else len(self.seasons) - 1
+        values = getattr(self, metric)[:, col]
+        valid = np.flatnonzero(~np.isnan(values))
+        top = valid[np.argsort(values[valid])[::-1][:n]]
+        return [{"name": self.names[row], "season": self.seasons[col], metric: round(float(values[row]), 2)} for row in top]
+
+    def describe(self, row: int) -> str:
+        """One-line season-by-season summary for the chat context."""
+        parts = []
+        for col, season in enumerate(self.seasons):
+            points = self.stats['total_points'][row, col]
+            if np.isnan(points):
+                continue
+            part = f"{season}: {int(points)} pts, £{self.stats['cost'][row, col]:.1f}m, {self.points_per_million[row, col]:.1f} pts/£m"
+            if not np.isnan(self.points_per_90[row, col]):
+                part += f", {self.points_per_90[row, col]:.2f} pts/90"
+            if not np.isnan(self.points_change[row, col]):
+                part += f" ({self.points_change[row, col]:+.0f} pts, {self.cost_change[row, col]:+.1f}m vs prior)"
+            parts.append(part)
+        return "; ".join(parts)
+
+@lru_cache(maxsize=1)
+def get_historical_stats() -> Optional[HistoricalStats]:
+    """Loads the store once per process. Returns None if the data file is missing."""
+    try:
+        with open(HISTORY_PATH, encoding='utf-8') as f:
+            raw = json.load(f)
+    except FileNotFoundError:
+        logging.warning("Historical stats file not found at %s.", HISTORY_PATH)
+        return None
+    stats = HistoricalStats(raw)
+    logging.info("📚 Loaded historical stats. players=%s, seasons=%s", len(stats.names), stats.seasons)
+    return stats
@@ -1,8 +1,9 @@
 # backend/live_data_service.py
-import httpx
 import asyncio
 from typing import List, Dict
 
+from fpl_client import get_client
+
 # --- Pydantic Models for Live Data ---
 # These can be moved to a central models.py file later if needed
 from pydantic import BaseModel
@@ -47,10 +48,10 @@ async def get_live_gameweek_data(team_id: int, gameweek: int, master_fpl_data):
     live_url = FPL_API_LIVE_GAMEWEEK.format(gameweek=gameweek)
     picks_url = FPL_API_TEAM_PICKS.format(team_id=team_id, gameweek=gameweek)
 
-    async with httpx.AsyncClient() as client:
-        live_task = client.get(live_url)
-        picks_task = client.get(picks_url)
-        live_res, picks_res = await asyncio.gather(live_task, picks_task)
+    client = get_client()
+    live_task = client.get(live_url)
+    picks_task = client.get(picks_url)
+    live_res, picks_res = await asyncio.gather(live_task, picks_task)
 
     if live_res.status_code != 200:
         raise ConnectionError(f"Live data not available for Gameweek {gameweek}.")
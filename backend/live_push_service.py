@@ -0,0 +1,130 @@
+# backend/live_push_service.py
+import asyncio
+import json
+import logging
+from typing import Dict, Iterable, Optional, Set
+
+import metrics
+from fpl_client import get_client
+from live_data_service import FPL_API_LIVE_GAMEWEEK
+
+LIVE_POLL_SECONDS = 30
+HEARTBEAT_SECONDS = 15
+
+class Subscriber:
+    """
+    One connected client. Updates are merged into `pending` rather than queued,
+    so a slow client only ever has one (latest) batch waiting instead of a backlog.
+    """
+    __slots__ = ('player_ids', 'pending', 'ready')
+
+    def __init__(self, player_ids: Iterable[int]):
+        self.player_ids: Set[int] = set(player_ids)
+        self.pending: Dict[int, int] = {}
+        self.ready = asyncio.Event()
+
+    def push(self, points: Dict[int, int]):
+        self.pending.update(points)
+        self.ready.set()
+
+    async def next_update(self, timeout: float) -> Optional[Dict[int, int]]:
+        """Waits for the next batch of changed points; returns None on timeout (time for a heartbeat)."""
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self.ready.clear()
+        update, self.pending = self.pending, {}
+        return update
+
+class LiveGameweekBroadcaster:
+    """
+    Polls one gameweek's live endpoint once per interval for the whole process and fans out only
+    the players whose points changed, to only the subscribers who own them.
+    """
+
+    def __init__(self, gameweek: int):
+        self.gameweek = gameweek
+        self.points: Dict[int, int] = {}
+        self.subscribers_by_player: Dict[int, Set[Subscriber]] = {}
+        self.subscriber_count = 0
+        self._poller: Optional[asyncio.Task] = None
+
+    def subscribe(self, player_ids: Iterable[int]) -> Subscriber:
+        subscriber = Subscriber(player_ids)
+        for player_id in subscriber.player_ids:
+            self.subscribers_by_player.setdefault(player_id, set()).add(subscriber)
+        self.subscriber_count += 1
+        # Send whatever is already known straight away
+        known = {pid: self.points[pid] for pid in subscriber.player_ids if pid in self.points}
+        if known:
+            subscriber.push(known)
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll_loop())
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        for player_id in subscriber.player_ids:
+            subscribers = self.subscribers_by_player.get(player_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self.subscribers_by_player[player_id]
+        self.subscriber_count -= 1
+
+    def _publish(self, latest: Dict[int, int]):
+        changed = {pid: pts for pid, pts in latest.items() if self.points.get(pid) != pts}
+        self.points = latest
+        batches: Dict[Subscriber, Dict[int, int]] = {}
+        for player_id, points in changed.items():
+            for subscriber in self.subscribers_by_player.get(player_id, ()):
+                batches.setdefault(subscriber, {})[player_id] = points
+        for subscriber, batch in batches.items():
+            subscriber.push(batch)
+        if changed:
+            logging.info("📡 Live GW%s: %s players changed, %s subscribers notified.", self.gameweek, len(changed), len(batches))
+
+    async def _poll_loop(self):
+        # Stops by itself once the last subscriber disconnects
+        while self.subscriber_count > 0:
+            try:
+                response = await get_client().get(FPL_API_LIVE_GAMEWEEK.format(gameweek=self.gameweek))
+                if response.status_code == 200:
+                    elements = response.json().get('elements', [])
+                    self._publish({element['id']: element['stats']['total_points'] for element in elements})
+                else:
+                    logging.warning("Live data not available for Gameweek %s (HTTP %s).", self.gameweek, response.status_code)
+            except Exception as e:
+                # A malformed response must not silently end updates for every subscriber
+                logging.error(f"❌ Live gameweek poll failed: {e}")
+            await asyncio.sleep(LIVE_POLL_SECONDS)
+
+# One broadcaster per gameweek, so clients still on the previous gameweek keep their own poller and points
+broadcasters: Dict[int, LiveGameweekBroadcaster] = {}
+metrics.LIVE_SUBSCRIBERS.set_function(lambda: sum(b.subscriber_count for b in broadcasters.values()))
+
+def get_broadcaster(gameweek: int) -> LiveGameweekBroadcaster:
+    # Drop broadcasters whose last subscriber left and whose poller has stopped
+    for idle in [gw for gw, b in broadcasters.items() if b.subscriber_count == 0 and (b._poller is None or b._poller.done())]:
+        del broadcasters[idle]
+    if gameweek not in broadcasters:
+        broadcasters[gameweek] = LiveGameweekBroadcaster(gameweek)
+    return broadcasters[gameweek]
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_live_points(gameweek: int, player_ids: Iterable[int]):
+    """Server-sent-events stream of {player_id: points} updates for the given players."""
+    broadcaster = get_broadcaster(gameweek)
+    subscriber = broadcaster.subscribe(player_ids)
+    try:
+        yield _sse("subscribed", {"gameweek": gameweek, "players": sorted(subscriber.player_ids)})
+        while True:
+            update = await subscriber.next_update(HEARTBEAT_SECONDS)
+            if update is None:
+                yield ": heartbeat\n\n"
+            else:
+                yield _sse("points", {"gameweek": gameweek, "players": {str(pid): pts for pid, pts in update.items()}})
+    finally:
+        broadcaster.unsubscribe(subscriber)
@@ -1,24 +1,34 @@
 import os
+import math
+import time
 import asyncio
-import pandas as pd
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional
-import re
+from typing import TYPE_CHECKING, Dict, List, Optional
 import logging
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from starlette.background import BackgroundTask
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-import google.generativeai as genai
-from supabase import create_client, Client
 
 # Import your services
-import chip_service
-import gemini_service
-from draft_service import DraftEngine
+# pandas, google.generativeai and supabase (and the services built on them) are imported
+# lazily during warm-up, so the worker binds and answers /api/status immediately.
+import team_service
+import admission_service
+import live_push_service
+import fpl_client
+import metrics
+import shared_snapshot
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from supabase import Client
+    from snapshot_service import PlayerRecord
 
 # --- Configuration & Logging ---
 load_dotenv()
@@ -27,87 +37,258 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     raise ValueError("GEMINI_API_KEY not found in .env file.")
-genai.configure(api_key=GEMINI_API_KEY)
 
 # --- Supabase Configuration ---
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 if not SUPABASE_URL or not SUPABASE_KEY:
     raise ValueError("Supabase URL and Key must be set in your .env file.")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase: Optional["Client"] = None
 
 # --- Paths ---
 DATA_DIR = Path(__file__).parent / "fpl_data"
 FBREF_STATS_PATH = DATA_DIR / "fbref_player_stats.csv"
 
 # --- In-Memory Stores ---
-master_fpl_data: Optional[pd.DataFrame] = None
+master_fpl_data: Optional["pd.DataFrame"] = None
 current_gameweek_id: Optional[int] = None
 teams_data_store: Optional[list] = None
+players_by_id: Optional[Dict[int, "PlayerRecord"]] = None
 is_game_live: bool = False
+data_loaded_at: Optional[float] = None
+# Sync version of the snapshot, for incremental refreshes (see supabase_sync.py)
+data_version: Optional[int] = None
 scheduler = AsyncIOScheduler()
 
+# --- Startup Phases ---
+startup_phase: str = "starting"
+startup_phases: Dict[str, float] = {}
+
+# --- Multi-Worker Snapshot Sharing ---
+# "standalone" (single worker), or "leader"/"follower" when SHARED_SNAPSHOT is enabled
+worker_role: str = "standalone"
+SHARED_SNAPSHOT_POLL_SECONDS = 10
+
 # --- FastAPI App ---
 app = FastAPI(title="FPL AI Chatbot API")
 
 # --- Core Data Processing ---
+def _fetch_payloads():
+    bootstrap_response = supabase.table("fpl_data").select("payload, version").eq("data_type", "bootstrap-static").single().execute()
+    fixtures_response = supabase.table("fpl_data").select("payload").eq("data_type", "fixtures").single().execute()
+    return bootstrap_response, fixtures_response
+
+def _select_all(table: str, columns: str, since_version: int, order_by: tuple, until_version: Optional[int] = None) -> list:
+    """
+    Pages through every row newer than `since_version` (and at most `until_version`). `order_by` must be
+    a unique key; otherwise ties may come back in a different order per page and offsets skip or repeat rows.
+    """
+    rows, page_size = [], 1000
+    while True:
+        query = supabase.table(table).select(columns).gt("version", since_version)
+        if until_version is not None:
+            query = query.lte("version", until_version)
+        for column in order_by:
+            query = query.order(column)
+        page = query.range(len(rows), len(rows) + page_size - 1).execute().data
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+
+def _fetch_updates_since(version: int):
+    versions = _select_all("fpl_sync_versions", "version, current_gameweek, fixtures_changed", version, order_by=("version",))
+    if not versions:
+        return versions, []
+    # A sync in progress has written deltas for a version it has not recorded yet; leave those for the next refresh
+    return versions, _select_all("fpl_player_deltas", "version, player_id, changes", version, order_by=("version", "player_id"),
+                                 until_version=versions[-1]['version'])
+
+async def apply_incremental_update() -> bool:
+    """
+    Brings the snapshot up to date from per-player delta rows instead of re-downloading the full payload.
+    Returns False when a full reload is required (gameweek rollover, fixture changes, new players,
+    transfers or renames, or gaps).
+    """
+    import snapshot_service
+    try:
+        versions, deltas = await asyncio.to_thread(_fetch_updates_since, data_version)
+    except Exception as e:
+        logging.error(f"❌ Failed to fetch deltas from Supabase: {e}")
+        return False
+
+    if not versions:
+        logging.info("✅ Snapshot already at version %s.", data_version)
+        return True
+    contiguous = [v['version'] for v in versions] == list(range(data_version + 1, data_version + 1 + len(versions)))
+    if not contiguous or any(v['fixtures_changed'] or v['current_gameweek'] != current_gameweek_id for v in versions):
+        return False
+
+    snapshot = await asyncio.to_thread(snapshot_service.apply_player_deltas, master_fpl_data, deltas)
+    if snapshot is None:
+        return False
+    state = {
+        "master_fpl_data": snapshot, "teams": teams_data_store, "current_gameweek_id": current_gameweek_id,
+        "is_game_live": is_game_live, "next_deadline_ts": team_service.current_deadline(),
+        "loaded_at": time.time(), "version": versions[-1]['version'],
+    }
+    if worker_role == "leader":
+        await asyncio.to_thread(shared_snapshot.publish, state)
+    apply_snapshot_state(state)
+    logging.info("✅ Applied %s player deltas. version=%s", len(deltas), data_version)
+    return True
+
+@metrics.timed
 async def load_and_process_all_data():
-    global master_fpl_data, current_gameweek_id, is_game_live, teams_data_store
+    import snapshot_service
+    if master_fpl_data is not None and data_version is not None:
+        if await apply_incremental_update():
+            return
     logging.info("🔄 Starting data update process from Supabase...")
     
     try:
-        bootstrap_response = supabase.table("fpl_data").select("payload").eq("data_type", "bootstrap-static").single().execute()
-        fixtures_response = supabase.table("fpl_data").select("payload").eq("data_type", "fixtures").single().execute()
+        # The Supabase client is synchronous; keep it off the event loop so health checks stay responsive
+        bootstrap_response, fixtures_response = await asyncio.to_thread(_fetch_payloads)
 
         if not bootstrap_response.data or not fixtures_response.data:
             raise ValueError("Required data not found in Supabase. Run the sync script first.")
 
         bootstrap_data = bootstrap_response.data['payload']
-        teams_data_store = bootstrap_data.get('teams', [])
         fixtures_data = fixtures_response.data['payload']
         
     except Exception as e:
         logging.error(f"❌ Failed to fetch data from Supabase: {e}")
         return
 
-    is_game_live = any(gw.get('is_current', False) for gw in bootstrap_data.get('events', []))
-    current_gameweek_id = next((gw['id'] for gw in bootstrap_data.get('events', []) if gw.get('is_current', False)), 1)
+    gameweek_id, game_live, next_deadline_ts = snapshot_service.parse_gameweek_state(bootstrap_data)
+    snapshot = await asyncio.to_thread(snapshot_service.build_player_snapshot, bootstrap_data, fixtures_data, gameweek_id)
+    state = {
+        "master_fpl_data": snapshot, "teams": bootstrap_data.get('teams', []), "current_gameweek_id": gameweek_id,
+        "is_game_live": game_live, "next_deadline_ts": next_deadline_ts, "loaded_at": time.time(),
+        "version": bootstrap_response.data.get('version'),
+    }
+    if worker_role == "leader":
+        await asyncio.to_thread(shared_snapshot.publish, state)
+    apply_snapshot_state(state)
+    snapshot_mb = snapshot_service.snapshot_memory_bytes(master_fpl_data) / 1e6
+    logging.info("✅ Data update complete. players=%s, gameweek=%s, is_live=%s, snapshot_mb=%.2f", len(master_fpl_data), current_gameweek_id, is_game_live, snapshot_mb)
 
-    teams_map = {team['id']: team['short_name'] for team in bootstrap_data.get('teams', [])}
-    position_map = {p_type['id']: p_type['singular_name_short'] for p_type in bootstrap_data.get('element_types', [])}
-    
-    team_fixtures = {team['id']: [] for team in bootstrap_data.get('teams', [])}
-    for fixture in fixtures_data:
-        if fixture.get('event') and fixture['event'] >= current_gameweek_id:
-            team_fixtures[fixture['team_h']].append({'gameweek': fixture['event'], 'opponent': teams_map.get(fixture['team_a'], 'N/A'), 'difficulty': fixture['team_h_difficulty'], 'is_home': True})
-            team_fixtures[fixture['team_a']].append({'gameweek': fixture['event'], 'opponent': teams_map.get(fixture['team_h'], 'N/A'), 'difficulty': fixture['team_a_difficulty'], 'is_home': False})
-
-    fpl_players_df = pd.DataFrame(bootstrap_data.get('elements', [])).rename(columns={'web_name': 'Player'})
-    fpl_players_df['team_name'] = fpl_players_df['team'].map(teams_map)
-    fpl_players_df['position'] = fpl_players_df['element_type'].map(position_map)
-    fpl_players_df['simple_name'] = fpl_players_df['Player'].str.lower().str.replace(r'[^a-z0-9\s]', '', regex=True).str.strip()
-    fpl_players_df['form'] = pd.to_numeric(fpl_players_df['form'], errors='coerce').fillna(0)
-    fpl_players_df['points_per_game'] = pd.to_numeric(fpl_players_df['points_per_game'], errors='coerce').fillna(0)
-    
-    # Attach the full list of upcoming fixtures to each player
-    fpl_players_df['fixture_details'] = fpl_players_df['team'].map(lambda x: sorted(team_fixtures.get(x, []), key=lambda f: f['gameweek']))
+def apply_snapshot_state(state: dict):
+    """Swaps a freshly built (or attached) snapshot into the in-memory stores."""
+    global master_fpl_data, current_gameweek_id, is_game_live, teams_data_store, players_by_id, data_loaded_at, data_version, startup_phase
+    import snapshot_service
+    team_service.set_gameweek_deadline(state["next_deadline_ts"])
+    players_by_id = snapshot_service.build_players_by_id(state["master_fpl_data"])
+    teams_data_store = state["teams"]
+    current_gameweek_id = state["current_gameweek_id"]
+    is_game_live = state["is_game_live"]
+    master_fpl_data = state["master_fpl_data"]
+    data_loaded_at = state["loaded_at"]
+    data_version = state["version"]
+    if startup_phase == "data_load_failed":
+        startup_phase = "ready"
 
-    merged_df = fpl_players_df
-    merged_df.drop_duplicates(subset=['id'], keep='first', inplace=True)
-    merged_df.set_index('Player', inplace=True)
-    master_fpl_data = merged_df
-    logging.info("✅ Data update complete. players=%s, gameweek=%s, is_live=%s", len(master_fpl_data), current_gameweek_id, is_game_live)
+async def follow_shared_snapshot():
+    """Follower loop: re-attaches whenever the leader publishes, and takes over if the leader exits."""
+    global worker_role
+    version = None
+    while True:
+        try:
+            if shared_snapshot.try_become_leader():
+                logging.info("👑 Leader lock acquired, taking over snapshot refreshes.")
+                worker_role = "leader"
+                await start_leader()
+                return
+            if shared_snapshot.snapshot_version() != version:
+                attached = await asyncio.to_thread(shared_snapshot.attach)
+                if attached:
+                    version, state = attached
+                    apply_snapshot_state(state)
+                    logging.info("📥 Attached shared snapshot. gameweek=%s", current_gameweek_id)
+        except Exception as e:
+            # Keep following (and retrying the lock); a dead loop would serve stale data forever
+            logging.error(f"❌ Shared snapshot follower error: {e}", exc_info=True)
+        await asyncio.sleep(SHARED_SNAPSHOT_POLL_SECONDS if master_fpl_data is not None else 1)
 
-# --- App Lifecycle & Schemas ---
-@app.on_event("startup")
-async def startup_event():
+async def start_leader():
     await load_and_process_all_data()
     scheduler.add_job(load_and_process_all_data, IntervalTrigger(minutes=15))
     scheduler.start()
 
+metrics.DATA_AGE.set_function(lambda: time.time() - data_loaded_at if data_loaded_at else -1)
+
+# --- App Lifecycle & Schemas ---
+@contextmanager
+def _startup_phase(name: str):
+    global startup_phase
+    startup_phase = name
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_phases[name] = round(time.perf_counter() - start, 3)
+
+def _import_heavy_dependencies() -> "Client":
+    """Imports the heavy libraries and services, configures Gemini and returns the Supabase client."""
+    import pandas  # noqa: F401
+    import google.generativeai as genai
+    from supabase import create_client
+    import chip_service  # noqa: F401
+    import context_service  # noqa: F401
+    import gemini_service  # noqa: F401
+    import snapshot_service  # noqa: F401
+    from history_service import get_historical_stats
+    get_historical_stats()
+    genai.configure(api_key=GEMINI_API_KEY)
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+def _warm_up_hot_paths():
+    """Runs each request path once so first-call costs are not paid by a user."""
+    import chip_service
+    from context_service import build_context_for_question
+    build_context_for_question("warm up", master_fpl_data, players_by_id)
+    chip_service.get_adjusted_fixture_difficulty(master_fpl_data, teams_data_store, current_gameweek_id)
+    chip_service.calculate_chip_recommendations_new(master_fpl_data, current_gameweek_id)
+
+async def warm_up():
+    global supabase, startup_phase, worker_role
+    try:
+        with _startup_phase("imports"):
+            supabase = await asyncio.to_thread(_import_heavy_dependencies)
+        if shared_snapshot.ENABLED:
+            worker_role = "leader" if shared_snapshot.try_become_leader() else "follower"
+        with _startup_phase("data_load"):
+            if worker_role == "follower":
+                app.state.follower_task = asyncio.create_task(follow_shared_snapshot())
+                while master_fpl_data is None and worker_role == "follower":
+                    await asyncio.sleep(0.5)
+            else:
+                await start_leader()
+        if master_fpl_data is None:
+            # The scheduled refresh keeps retrying; apply_snapshot_state flips this to "ready" once it succeeds
+            startup_phase = "data_load_failed"
+            logging.error("❌ Warm-up finished without data: %s", startup_phases)
+            return
+        with _startup_phase("warm_up"):
+            await asyncio.to_thread(_warm_up_hot_paths)
+        startup_phase = "ready"
+        logging.info("✅ Warm-up complete: %s", startup_phases)
+    except Exception as e:
+        startup_phase = "failed"
+        logging.error(f"❌ Warm-up failed: {e}", exc_info=True)
+
+@app.on_event("startup")
+async def startup_event():
+    # Don't block startup: the worker binds immediately and warms up in the background
+    app.state.warm_up_task = asyncio.create_task(warm_up())
+
 @app.on_event("shutdown")
-def shutdown_event():
-    scheduler.shutdown()
+async def shutdown_event():
+    app.state.warm_up_task.cancel()
+    if hasattr(app.state, "follower_task"):
+        app.state.follower_task.cancel()
+    if scheduler.running:
+        scheduler.shutdown()
+    await fpl_client.close_client()
 
 app.add_middleware(CORSMiddleware,
     allow_origins=["https://fpl-chatbot.vercel.app", "https://fpl-brain.vercel.app", "http://localhost:5173"],
@@ -121,93 +302,109 @@ class ChatRequest(BaseModel):
 # --- API Endpoints ---
 @app.get("/api/status")
 async def get_status():
-    if master_fpl_data is None: return {"status": "initializing"}
-    return {"status": "ok", "current_gameweek": current_gameweek_id}
+    phases = {"phase": startup_phase, "phases": startup_phases, "role": worker_role}
+    if master_fpl_data is None: return {"status": "initializing", **phases}
+    return {"status": "ok", "current_gameweek": current_gameweek_id, **phases}
 
 @app.get("/api/fixture-difficulty")
 async def get_fixture_difficulty_data():
     if master_fpl_data is None: raise HTTPException(status_code=503, detail="Data not available.")
+    import chip_service
     return chip_service.get_adjusted_fixture_difficulty(master_fpl_data, teams_data_store, current_gameweek_id)
 
 @app.get("/api/chip-recommendations")
 async def get_chip_recommendations_data():
     if master_fpl_data is None: raise HTTPException(status_code=503, detail="Data not available.")
+    import chip_service
     return chip_service.calculate_chip_recommendations_new(master_fpl_data, current_gameweek_id)
 
-# --- CONTEXT BUILDER ---
-def build_context_for_question(question: str, all_players_df: pd.DataFrame) -> str:
-    if all_players_df is None: return ""
-    question_lower = question.lower()
-    
-    # Intent 1: Transfer Search
-    transfer_triggers = ['buy', 'get', 'transfer', 'replace', 'midfielder', 'forward', 'defender']
-    budget_match = re.search(r'(\d{1,2}(\.\d{1,2})?)m', question_lower)
-    if any(trigger in question_lower for trigger in transfer_triggers) and budget_match:
-        budget = float(budget_match.group(1)) * 10
-        position = ""
-        if 'midfielder' in question_lower: position = 'MID'
-        elif 'forward' in question_lower: position = 'FWD'
-        elif 'defender' in question_lower: position = 'DEF'
-        df_filtered = all_players_df.copy()
-        if position: df_filtered = df_filtered[df_filtered['position'] == position]
-        df_filtered = df_filtered[df_filtered['now_cost'] <= budget]
-        df_filtered['score'] = (pd.to_numeric(df_filtered['form']) * 1.5 + pd.to_numeric(df_filtered.get('ict_index', 0)) * 1.0 + pd.to_numeric(df_filtered['points_per_game']) * 1.2)
-        top_candidates = df_filtered.sort_values(by='score', ascending=False).head(5)
-        if not top_candidates.empty:
-            context = f"Top transfer candidates (Position: {position or 'Any'}, Budget: £{budget/10.0:.1f}m):\n"
-            for name, player in top_candidates.iterrows():
-                fixtures = ", ".join([f"{f['opponent']}({'H' if f['is_home'] else 'A'})" for f in player.get('fixture_details', [])[:5]])
-                context += f"- {name} ({player.get('team_name')}, £{player.get('now_cost',0)/10.0:.1f}m): Form: {player.get('form',0)}, Fixtures: {fixtures}\n"
-            return context
-
-    # Intent 2: Best Value Search
-    value_triggers = ['value', 'undervalued', 'points per million']
-    if any(trigger in question_lower for trigger in value_triggers):
-        df_value = all_players_df.copy()
-        df_value = df_value[pd.to_numeric(df_value['total_points']) > 50]
-        if not df_value.empty:
-            df_value['points_per_million'] = pd.to_numeric(df_value['total_points']) / (pd.to_numeric(df_value['now_cost']) / 10.0)
-            top_value_players = df_value.sort_values(by='points_per_million', ascending=False).head(10)
-            context = "Top 10 best value players (>50 total points):\n"
-            for name, player in top_value_players.iterrows():
-                context += f"- {name} ({player.get('team_name')}, £{player.get('now_cost',0)/10.0:.1f}m): {player.get('points_per_million', 0):.2f} PPM\n"
-            return context
-
-    # Intent 3: Specific Player Lookup
-    player_names_found = []
-    cleaned_question = re.sub(r"['’]s\b", "", question_lower)
-    df_for_lookup = all_players_df.reset_index()
-    for _, row in df_for_lookup.iterrows():
-        if row['simple_name'] in cleaned_question:
-            player_names_found.append(row['Player'])
-    if player_names_found:
-        unique_players = sorted(list(set(player_names_found)))
-        context = "Player Data:\n"
-        for name in unique_players:
-            if name in all_players_df.index:
-                player_data = all_players_df.loc[name]
-                fixtures = ", ".join([f"{f['opponent']}({'H' if f['is_home'] else 'A'})" for f in player_data.get('fixture_details', [])[:5]])
-                context += f"- {name} ({player_data.get('team_name')}, £{player_data.get('now_cost',0)/10.0:.1f}m): Points: {player_data.get('total_points',0)}, Form: {player_data.get('form',0)}, Fixtures: {fixtures}\n"
-        return context
-    return ""
+@app.get("/api/get-team-data/{team_id}")
+async def get_team_data(team_id: int):
+    if master_fpl_data is None: raise HTTPException(status_code=503, detail="Data not available.")
+    try:
+        return await team_service.get_team_data(team_id, current_gameweek_id, players_by_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ConnectionError as e:
+        logging.error(f"❌ Failed to fetch team data for {team_id}: {e}")
+        raise HTTPException(status_code=502, detail="Could not reach the FPL API. Please try again.")
+
+@app.get("/api/live-gameweek-stream/{team_id}")
+async def stream_live_gameweek(team_id: int):
+    """Pushes live points for the team's players as they change, instead of the client polling."""
+    if master_fpl_data is None: raise HTTPException(status_code=503, detail="Data not available.")
+    try:
+        team_data = await team_service.get_team_data(team_id, current_gameweek_id, players_by_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ConnectionError as e:
+        logging.error(f"❌ Failed to fetch team data for {team_id}: {e}")
+        raise HTTPException(status_code=502, detail="Could not reach the FPL API. Please try again.")
+    player_ids = [player['id'] for player in team_data['players']]
+    if not player_ids:
+        # No picks yet (before the manager's first deadline): there is nothing to stream
+        raise HTTPException(status_code=404, detail=f"Team ID {team_id} has no picks for Gameweek {current_gameweek_id}.")
+    return StreamingResponse(
+        live_push_service.stream_live_points(current_gameweek_id, player_ids),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/profile")
+async def get_profile(seconds: float = 10.0):
+    """Samples this worker's stacks for N seconds; returns collapsed stacks for flamegraph.pl or speedscope."""
+    if os.getenv("ENABLE_PROFILER", "").lower() not in ("1", "true", "yes"):
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not 0 < seconds <= 60:
+        raise HTTPException(status_code=400, detail="seconds must be between 0 and 60.")
+    return PlainTextResponse(await metrics.profile(seconds))
 
 # --- Main Chat Endpoint ---
 @app.post("/api/chat")
-async def chat_with_bot(request: ChatRequest):
-    return StreamingResponse(stream_chat_response(request), media_type="text/plain")
+async def chat_with_bot(request: ChatRequest, http_request: Request):
+    client_ip = admission_service.client_ip(http_request.headers, http_request.client)
+    try:
+        await admission_service.check_rate_limits(client_ip, http_request.headers.get("x-api-key"))
+        cache_key = admission_service.answer_cache_key(request.question, request.history, data_loaded_at)
+        cached_answer = admission_service.get_cached_answer(cache_key)
+        if cached_answer is not None:
+            # No LLM connection needed, so skip the stream queue entirely
+            return StreamingResponse(iter([cached_answer]), media_type="text/plain")
+        slot = await admission_service.chat_admission.acquire()
+    except admission_service.RateLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+    return StreamingResponse(stream_chat_response(request, slot, cache_key), media_type="text/plain", background=BackgroundTask(slot.release))
+
+async def stream_chat_response(request: ChatRequest, slot=None, cache_key=None):
+    try:
+        async for chunk in _generate_chat_response(request, cache_key):
+            yield chunk
+    finally:
+        if slot is not None:
+            slot.release()
 
-async def stream_chat_response(request: ChatRequest):
+async def _generate_chat_response(request: ChatRequest, cache_key=None):
     if master_fpl_data is None:
         yield "Sorry, data is initializing. Please try again in a moment.\n"
         return
+    import gemini_service
+    from context_service import build_context_for_question
     try:
-        context_block = build_context_for_question(request.question, master_fpl_data)
+        context_block = build_context_for_question(request.question, master_fpl_data, players_by_id)
+        metrics.CONTEXT_BYTES.observe(len(context_block.encode('utf-8')))
         gemini_history = []
         for message in request.history:
             gemini_history.append({"role": "model" if message.get("role") != "user" else "user", "parts": [{"text": message.get("text")}]})
         
+        answer_chunks = []
         async for chunk in gemini_service.get_ai_response_stream(request.question, gemini_history, context_block, is_game_live):
+            answer_chunks.append(chunk)
             yield chunk
+        admission_service.store_answer(cache_key, "".join(answer_chunks))
             
     except Exception as e:
         logging.error(f"Error during chat streaming: {e}", exc_info=True)
@@ -0,0 +1,191 @@
+# backend/metrics.py
+import asyncio
+import functools
+import inspect
+import sys
+import threading
+import time
+from collections import Counter as _Tally
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# --------------------------------------------------------------------------
+# ## Minimal Prometheus-style registry
+# --------------------------------------------------------------------------
+# Kept in-process and dependency-free; rendered in the text exposition format on /metrics.
+
+_lock = threading.Lock()
+_registry: list = []
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        _registry.append(self)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with _lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        # Snapshot under the lock: worker threads (asyncio.to_thread) may add series mid-scrape
+        with _lock:
+            values = list(self._values.items())
+        for key, value in sorted(values):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Gauge:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Optional[Callable[[], float]] = None
+        _registry.append(self)
+
+    def set(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with _lock:
+            self._values[key] = float(value)
+
+    def set_function(self, function: Callable[[], float]):
+        """Evaluates the gauge lazily at scrape time instead of storing a value."""
+        self._function = function
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        if self._function is not None:
+            lines.append(f"{self.name} {self._function()}")
+        with _lock:
+            values = list(self._values.items())
+        for key, value in sorted(values):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Histogram:
+    DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}  # key -> [bucket counts..., sum, count]
+        _registry.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with _lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        # Copy each series too, so its bucket counts, sum and count come from the same moment
+        with _lock:
+            all_series = [(key, list(series)) for key, series in self._series.items()]
+        for key, series in sorted(all_series):
+            for i, bound in enumerate(self.buckets):
+                bucket_label = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, bucket_label)} {series[i]}")
+            inf_label = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, inf_label)} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+def render() -> str:
+    """Renders every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# --------------------------------------------------------------------------
+# ## Application metrics
+# --------------------------------------------------------------------------
+
+_BYTE_BUCKETS = (1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000)
+
+FUNCTION_LATENCY = Histogram("fpl_function_duration_seconds", "Wall time of instrumented hot-path functions.", ["function"])
+UPSTREAM_LATENCY = Histogram("fpl_upstream_request_duration_seconds", "Time to response headers for upstream HTTP calls.", ["host", "status"])
+UPSTREAM_PAYLOAD_BYTES = Histogram("fpl_upstream_response_bytes", "Declared size of upstream HTTP response bodies.", ["host"], buckets=_BYTE_BUCKETS)
+CONTEXT_BYTES = Histogram("fpl_chat_context_bytes", "Size of the context block sent to the LLM.", buckets=(0, 100, 500, 1_000, 2_500, 5_000, 10_000, 50_000))
+CACHE_REQUESTS = Counter("fpl_cache_requests_total", "Cache lookups by cache and result (hit, miss, shared).", ["cache", "result"])
+CHAT_REJECTIONS = Counter("fpl_chat_rejections_total", "Chat requests rejected with 429, by reason.", ["reason"])
+CHAT_QUEUE_DEPTH = Gauge("fpl_chat_queue_depth", "Chat requests waiting for a stream slot.")
+CHAT_ACTIVE_STREAMS = Gauge("fpl_chat_active_streams", "Chat streams currently holding an LLM connection.")
+LIVE_SUBSCRIBERS = Gauge("fpl_live_subscribers", "Open live gameweek SSE connections.")
+DATA_AGE = Gauge("fpl_data_age_seconds", "Seconds since the player snapshot was last rebuilt.")
+
+def timed(function):
+    """Records the wall time of a sync or async function in FUNCTION_LATENCY."""
+    label = function.__qualname__
+
+    if inspect.iscoroutinefunction(function):
+        @functools.wraps(function)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                FUNCTION_LATENCY.observe(time.perf_counter() - start, function=label)
+        return async_wrapper
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            FUNCTION_LATENCY.observe(time.perf_counter() - start, function=label)
+    return wrapper
+
+# --- httpx event hooks for upstream calls ---
+async def on_upstream_request(request):
+    request.extensions["metrics_start"] = time.perf_counter()
+
+async def on_upstream_response(response):
+    request = response.request
+    start = request.extensions.get("metrics_start")
+    if start is not None:
+        UPSTREAM_LATENCY.observe(time.perf_counter() - start, host=request.url.host, status=response.status_code)
+    content_length = response.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        UPSTREAM_PAYLOAD_BYTES.observe(int(content_length), host=request.url.host)
+
+# --------------------------------------------------------------------------
+# ## Sampling profiler
+# --------------------------------------------------------------------------
+
+def _sample_stacks(seconds: float, interval: float) -> str:
+    """Samples every thread's stack and returns them in collapsed (flamegraph.pl / speedscope) format."""
+    own_thread = threading.get_ident()
+    tally = _Tally()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            tally[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return "\n".join(f"{stack} {count}" for stack, count in tally.most_common()) + "\n"
+
+async def profile(seconds: float, interval: float = 0.005) -> str:
+    """Runs the sampler in a background thread so the event loop keeps serving (and being sampled)."""
+    return await asyncio.to_thread(_sample_stacks, seconds, interval)
@@ -0,0 +1,133 @@
+# backend/shared_snapshot.py
+import logging
+import mmap
+import os
+import pickle
+import stat
+import struct
+import tempfile
+from pathlib import Path
+from typing import Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, every worker runs standalone
+    fcntl = None
+
+# --- Configuration ---
+# Multi-worker mode is opt-in; a single worker keeps the plain in-process snapshot.
+ENABLED = os.getenv("SHARED_SNAPSHOT", "").lower() in ("1", "true", "yes") and fcntl is not None
+_default_dir = Path("/dev/shm") if Path("/dev/shm").is_dir() else Path(tempfile.gettempdir())
+SNAPSHOT_DIR = Path(os.getenv("SHARED_SNAPSHOT_DIR", _default_dir / "fpl-chatbot"))
+SNAPSHOT_PATH = SNAPSHOT_DIR / "snapshot.bin"
+LOCK_PATH = SNAPSHOT_DIR / "leader.lock"
+
+_HEADER = struct.Struct("<QQ")  # pickle length, buffer count
+_ALIGNMENT = 64
+
+_lock_fd: Optional[int] = None
+
+# --------------------------------------------------------------------------
+# ## Directory checks
+# --------------------------------------------------------------------------
+# Followers unpickle whatever is in SNAPSHOT_DIR, so it must be private to this user:
+# anyone able to write there could otherwise run code in every worker.
+
+def _ensure_private_dir():
+    try:
+        os.mkdir(SNAPSHOT_DIR, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(SNAPSHOT_DIR)
+    if not stat.S_ISDIR(st.st_mode):
+        raise PermissionError(f"{SNAPSHOT_DIR} is not a directory; refusing to use it for the shared snapshot.")
+    if st.st_uid != os.getuid():
+        raise PermissionError(f"{SNAPSHOT_DIR} is owned by uid {st.st_uid}, not this user; refusing to use it.")
+    if st.st_mode & 0o077:
+        raise PermissionError(f"{SNAPSHOT_DIR} has mode {oct(st.st_mode & 0o777)}; it must not be accessible to other users (0o700).")
+
+# --------------------------------------------------------------------------
+# ## Leader election
+# --------------------------------------------------------------------------
+
+def try_become_leader() -> bool:
+    """Takes the leader lock without blocking. The lock is held until the process exits."""
+    global _lock_fd
+    if _lock_fd is not None:
+        return True
+    _ensure_private_dir()
+    fd = os.open(LOCK_PATH, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return False
+    os.ftruncate(fd, 0)
+    os.write(fd, str(os.getpid()).encode())
+    _lock_fd = fd
+    return True
+
+# --------------------------------------------------------------------------
+# ## Publish / attach
+# --------------------------------------------------------------------------
+# File layout: header | buffer lengths | pickle stream | 64-byte aligned out-of-band buffers.
+# Pickle protocol 5 moves numpy/pandas column data out of band, so followers can map it
+# read-only straight from the page cache instead of each holding a private copy.
+
+def _pad(offset: int) -> int:
+    return (-offset) % _ALIGNMENT
+
+def publish(state: dict):
+    """Atomically writes the snapshot state for followers to attach to."""
+    _ensure_private_dir()
+    buffers = []
+    payload = pickle.dumps(state, protocol=5, buffer_callback=buffers.append)
+    raw_buffers = [buffer.raw() for buffer in buffers]
+
+    fd, tmp_path = tempfile.mkstemp(dir=SNAPSHOT_DIR, prefix=".snapshot-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(_HEADER.pack(len(payload), len(raw_buffers)))
+        f.write(struct.pack(f"<{len(raw_buffers)}Q", *(buffer.nbytes for buffer in raw_buffers)))
+        f.write(payload)
+        for buffer in raw_buffers:
+            f.write(b"\0" * _pad(f.tell()))
+            f.write(buffer)
+    os.replace(tmp_path, SNAPSHOT_PATH)
+    logging.info("📤 Published shared snapshot (%.2f MB).", SNAPSHOT_PATH.stat().st_size / 1e6)
+
+def snapshot_version() -> Optional[int]:
+    """Cheap change check for followers: the published file's mtime in ns, or None if absent."""
+    try:
+        return SNAPSHOT_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def attach() -> Optional[Tuple[int, dict]]:
+    """Maps the published snapshot read-only and returns (version, state), or None if none is published."""
+    _ensure_private_dir()
+    try:
+        fd = os.open(SNAPSHOT_PATH, os.O_RDONLY | os.O_NOFOLLOW)
+    except FileNotFoundError:
+        return None
+    with os.fdopen(fd, "rb") as f:
+        file_stat = os.fstat(f.fileno())
+        if file_stat.st_uid != os.getuid():
+            raise PermissionError(f"{SNAPSHOT_PATH} is owned by uid {file_stat.st_uid}, not this user; refusing to load it.")
+        version = file_stat.st_mtime_ns
+        # The mapping stays valid after the leader replaces the file; it is freed with the last array using it
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(mapped)
+    payload_length, buffer_count = _HEADER.unpack_from(view, 0)
+    offset = _HEADER.size
+    lengths = struct.unpack_from(f"<{buffer_count}Q", view, offset)
+    offset += 8 * buffer_count
+    payload = view[offset:offset + payload_length]
+    offset += payload_length
+
+    buffers = []
+    for length in lengths:
+        offset += _pad(offset)
+        buffers.append(view[offset:offset + length])
+        offset += length
+    return version, pickle.loads(payload, buffers=buffers)
@@ -0,0 +1,130 @@
+# backend/snapshot_service.py
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+import metrics
+
+# Columns kept from the FPL `elements` payload, and the compact dtype each is stored as.
+SNAPSHOT_DTYPES = {
+    'id': 'int16', 'team': 'int8', 'element_type': 'int8',
+    'now_cost': 'int16', 'total_points': 'int16', 'minutes': 'int16',
+    'goals_scored': 'int16', 'assists': 'int16',
+    'form': 'float32', 'points_per_game': 'float32', 'ict_index': 'float32', 'selected_by_percent': 'float32',
+    'status': 'category',
+}
+# Player fields that derived columns (team_name, position, fixtures, names) are built from; deltas cannot patch them in place.
+REBUILD_FIELDS = ('team', 'element_type', 'web_name', 'first_name', 'second_name')
+
+class PlayerRecord:
+    """Slotted, attribute-access view of one snapshot row for per-request hot paths."""
+    __slots__ = ('id', 'name', 'full_name', 'simple_name', 'team_name', 'position', 'now_cost', 'total_points', 'form', 'fixture_details')
+
+    def __init__(self, id, name, full_name, simple_name, team_name, position, now_cost, total_points, form, fixture_details):
+        self.id = id
+        self.name = name
+        self.full_name = full_name
+        self.simple_name = simple_name
+        self.team_name = team_name
+        self.position = position
+        self.now_cost = now_cost
+        self.total_points = total_points
+        self.form = form
+        self.fixture_details = fixture_details
+
+    def to_dict(self) -> dict:
+        return {'id': self.id, 'name': self.name, 'team_name': self.team_name, 'position': self.position,
+                'now_cost': self.now_cost, 'total_points': self.total_points, 'form': self.form}
+
+def parse_gameweek_state(bootstrap_data: dict) -> Tuple[int, bool, Optional[float]]:
+    """Returns (current gameweek, whether a gameweek is live, next deadline as a UTC timestamp)."""
+    events = bootstrap_data.get('events', [])
+    is_game_live = any(gw.get('is_current', False) for gw in events)
+    current_gameweek_id = next((gw['id'] for gw in events if gw.get('is_current', False)), 1)
+    next_deadline = next((gw.get('deadline_time') for gw in events if gw.get('is_next', False)), None)
+    next_deadline_ts = datetime.fromisoformat(next_deadline.replace('Z', '+00:00')).timestamp() if next_deadline else None
+    return current_gameweek_id, is_game_live, next_deadline_ts
+
+@metrics.timed
+def build_player_snapshot(bootstrap_data: dict, fixtures_data: list, current_gameweek_id: int) -> pd.DataFrame:
+    """Transforms the raw bootstrap-static and fixtures payloads into the player table, indexed by player name."""
+    teams_map = {team['id']: team['short_name'] for team in bootstrap_data.get('teams', [])}
+    position_map = {p_type['id']: p_type['singular_name_short'] for p_type in bootstrap_data.get('element_types', [])}
+    
+    team_fixtures = {team['id']: [] for team in bootstrap_data.get('teams', [])}
+    for fixture in fixtures_data:
+        if fixture.get('event') and fixture['event'] >= current_gameweek_id:
+            team_fixtures[fixture['team_h']].append({'gameweek': fixture['event'], 'opponent': teams_map.get(fixture['team_a'], 'N/A'), 'difficulty': fixture['team_h_difficulty'], 'is_home': True})
+            team_fixtures[fixture['team_a']].append({'gameweek': fixture['event'], 'opponent': teams_map.get(fixture['team_h'], 'N/A'), 'difficulty': fixture['team_a_difficulty'], 'is_home': False})
+
+    # Select only the columns we use and convert them once to compact dtypes
+    fpl_players_df = pd.DataFrame(bootstrap_data.get('elements', []))
+    # "First Second" matches the keys of the historical stats file
+    fpl_players_df['full_name'] = fpl_players_df.get('first_name', '') + ' ' + fpl_players_df.get('second_name', '')
+    fpl_players_df = fpl_players_df.reindex(columns=['web_name', 'full_name', *SNAPSHOT_DTYPES]).rename(columns={'web_name': 'Player'})
+    for column, dtype in SNAPSHOT_DTYPES.items():
+        if dtype == 'category':
+            fpl_players_df[column] = fpl_players_df[column].astype('category')
+        else:
+            fpl_players_df[column] = pd.to_numeric(fpl_players_df[column], errors='coerce').fillna(0).astype(dtype)
+    fpl_players_df['team_name'] = fpl_players_df['team'].map(teams_map).astype('category')
+    fpl_players_df['position'] = fpl_players_df['element_type'].map(position_map).astype('category')
+    fpl_players_df['simple_name'] = fpl_players_df['Player'].str.lower().str.replace(r'[^a-z0-9\s]', '', regex=True).str.strip()
+    
+    # Attach the full list of upcoming fixtures to each player; teammates share one list
+    sorted_team_fixtures = {team_id: sorted(fixtures, key=lambda f: f['gameweek']) for team_id, fixtures in team_fixtures.items()}
+    fpl_players_df['fixture_details'] = fpl_players_df['team'].map(lambda x: sorted_team_fixtures.get(x, []))
+
+    merged_df = fpl_players_df
+    merged_df.drop_duplicates(subset=['id'], keep='first', inplace=True)
+    merged_df.set_index('Player', inplace=True)
+    return merged_df
+
+def build_players_by_id(master_fpl_data: pd.DataFrame) -> Dict[int, PlayerRecord]:
+    """Id-keyed lookup of PlayerRecords, for joining FPL API picks to the snapshot in O(1)."""
+    df = master_fpl_data.reset_index()
+    # tolist() yields native Python scalars, so records serialize without numpy types
+    columns = zip(df['id'].tolist(), df['Player'].tolist(), df['full_name'].tolist(), df['simple_name'].tolist(), df['team_name'].astype(str).tolist(),
+                  df['position'].astype(str).tolist(), df['now_cost'].tolist(), df['total_points'].tolist(),
+                  [round(form, 1) for form in df['form'].tolist()], df['fixture_details'].tolist())
+    return {values[0]: PlayerRecord(*values) for values in columns}
+
+def apply_player_deltas(master_fpl_data: pd.DataFrame, deltas: List[dict]) -> Optional[pd.DataFrame]:
+    """
+    Applies ordered {player_id, changes} delta rows to a copy of the snapshot.
+    Returns None if a delta refers to a player not in the snapshot or changes one of REBUILD_FIELDS
+    (e.g. a mid-season transfer), in which case a full rebuild is needed.
+    """
+    # Later versions overwrite earlier ones; fields the snapshot does not keep are ignored
+    latest_by_field: Dict[str, Dict[int, object]] = {}
+    for delta in deltas:
+        if any(field in REBUILD_FIELDS for field in delta['changes']):
+            return None
+        for field, value in delta['changes'].items():
+            if field in SNAPSHOT_DTYPES:
+                latest_by_field.setdefault(field, {})[delta['player_id']] = value
+
+    updated = master_fpl_data.copy()
+    id_index = pd.Index(updated['id'])
+    for field, values in latest_by_field.items():
+        positions = id_index.get_indexer(list(values))
+        if (positions < 0).any():
+            return None
+        dtype = SNAPSHOT_DTYPES[field]
+        new_values = pd.Series(list(values.values()))
+        column = updated[field]
+        if dtype == 'category':
+            missing = sorted(set(new_values.dropna()) - set(column.cat.categories))
+            if missing:
+                column = column.cat.add_categories(missing)
+        else:
+            new_values = pd.to_numeric(new_values, errors='coerce').fillna(0).astype(dtype)
+        column = column.copy()
+        column.iloc[positions] = new_values.to_numpy()
+        updated[field] = column
+    return updated
+
+def snapshot_memory_bytes(master_fpl_data: pd.DataFrame) -> int:
+    """Deep memory footprint of the player table (fixture lists shared between teammates are counted per row)."""
+    return int(master_fpl_data.memory_usage(deep=True).sum())
@@ -0,0 +1,37 @@
+-- Tables used by supabase_sync.py and the backend's incremental refresh.
+
+-- Full payloads, one row per data_type ("bootstrap-static", "fixtures").
+create table if not exists fpl_data (
+    data_type text primary key,
+    payload jsonb not null,
+    version bigint not null default 0
+);
+alter table fpl_data add column if not exists version bigint not null default 0;
+
+-- One row per sync run.
+create table if not exists fpl_sync_versions (
+    version bigint primary key,
+    current_gameweek integer not null,
+    fixtures_hash text not null,
+    fixtures_changed boolean not null,
+    synced_at timestamptz not null default now()
+);
+
+-- Changed player fields per sync run.
+create table if not exists fpl_player_deltas (
+    version bigint not null,
+    player_id integer not null,
+    changes jsonb not null,
+    primary key (version, player_id)
+);
+
+-- Price changes, queryable without downloading payloads.
+create table if not exists fpl_price_history (
+    version bigint not null,
+    player_id integer not null,
+    old_cost integer not null,
+    new_cost integer not null,
+    changed_at timestamptz not null default now(),
+    primary key (version, player_id)
+);
+create index if not exists fpl_price_history_player_idx on fpl_price_history (player_id, version);
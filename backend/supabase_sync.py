@@ -1,6 +1,9 @@
 import os
+import json
+import hashlib
 import httpx
 import asyncio
+from typing import Dict, List, Optional
 from supabase import create_client, Client
 from dotenv import load_dotenv
 import logging
@@ -18,11 +21,64 @@ SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 if not SUPABASE_URL or not SUPABASE_KEY:
     raise ValueError("Supabase URL and Key must be set in your .env file.")
 
+# --- Delta Tables ---
+# See supabase_schema.sql. Each sync gets a version; only player fields that changed are stored.
+DELTAS_TABLE = "fpl_player_deltas"
+PRICE_HISTORY_TABLE = "fpl_price_history"
+VERSIONS_TABLE = "fpl_sync_versions"
+DELTA_FIELDS = (
+    'now_cost', 'status', 'news', 'chance_of_playing_next_round', 'form', 'points_per_game',
+    'total_points', 'event_points', 'minutes', 'goals_scored', 'assists', 'ict_index', 'selected_by_percent',
+    # Changes to these make backends rebuild the snapshot (see snapshot_service.REBUILD_FIELDS)
+    'team', 'element_type', 'web_name', 'first_name', 'second_name',
+)
+INSERT_BATCH_SIZE = 500
+
 # Headers to mimic a browser request
 API_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 }
 
+def diff_players(previous_elements: List[dict], current_elements: List[dict]) -> Dict[int, dict]:
+    """
+    Returns {player_id: {field: new_value}} for every tracked field that changed since the previous snapshot.
+    Players new to the game get all tracked fields.
+    """
+    previous_by_id = {element['id']: element for element in previous_elements}
+    deltas = {}
+    for element in current_elements:
+        previous = previous_by_id.get(element['id'])
+        changes = {field: element.get(field) for field in DELTA_FIELDS if previous is None or element.get(field) != previous.get(field)}
+        if changes:
+            deltas[element['id']] = changes
+    return deltas
+
+def fixtures_signature(fixtures_data: List[dict]) -> str:
+    """Hash of the fixture fields the backend uses, so backends can tell when fixtures need a full reload."""
+    key_fields = sorted((f['id'], f.get('event'), f['team_h'], f['team_a'], f['team_h_difficulty'], f['team_a_difficulty']) for f in fixtures_data)
+    return hashlib.sha1(json.dumps(key_fields).encode()).hexdigest()
+
+def _replace_version_rows(supabase: Client, table: str, version: int, rows: List[dict]):
+    """
+    Writes a version's rows idempotently. A run that failed before the fpl_data upsert leaves rows
+    under the same version number the retry will use; clear those first so they cannot clash or linger.
+    """
+    supabase.table(table).delete().eq("version", version).execute()
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        supabase.table(table).upsert(rows[start:start + INSERT_BATCH_SIZE], on_conflict="version,player_id").execute()
+
+def _previous_sync(supabase: Client) -> Optional[dict]:
+    """Returns the previously stored bootstrap payload, its version and the last fixtures signature."""
+    previous = supabase.table("fpl_data").select("payload, version").eq("data_type", "bootstrap-static").limit(1).execute()
+    if not previous.data:
+        return None
+    last_version = supabase.table(VERSIONS_TABLE).select("fixtures_hash").order("version", desc=True).limit(1).execute()
+    return {
+        "payload": previous.data[0]['payload'],
+        "version": previous.data[0].get('version') or 0,
+        "fixtures_hash": last_version.data[0]['fixtures_hash'] if last_version.data else None,
+    }
+
 async def sync_fpl_data_to_supabase():
     """
     Fetches the latest FPL bootstrap and fixtures data and upserts it into a Supabase table.
@@ -45,17 +101,42 @@ async def sync_fpl_data_to_supabase():
 
         logging.info("✅ Successfully fetched data from FPL API.")
 
-        # Upsert (update or insert) the data into the Supabase table
+        previous = _previous_sync(supabase)
+        version = (previous["version"] if previous else 0) + 1
+        current_fixtures_hash = fixtures_signature(fixtures_data)
+        current_gameweek = next((gw['id'] for gw in bootstrap_data.get('events', []) if gw.get('is_current', False)), 1)
+
+        if previous:
+            deltas = diff_players(previous["payload"].get('elements', []), bootstrap_data.get('elements', []))
+            previous_costs = {element['id']: element.get('now_cost') for element in previous["payload"].get('elements', [])}
+            _replace_version_rows(supabase, DELTAS_TABLE, version, [
+                {"version": version, "player_id": player_id, "changes": changes} for player_id, changes in deltas.items()
+            ])
+            _replace_version_rows(supabase, PRICE_HISTORY_TABLE, version, [
+                {"version": version, "player_id": player_id, "old_cost": previous_costs[player_id], "new_cost": changes['now_cost']}
+                for player_id, changes in deltas.items() if 'now_cost' in changes and player_id in previous_costs
+            ])
+            logging.info("🧮 Version %s: %s players changed.", version, len(deltas))
+
+        # Full payloads stay available for cold starts, tagged with the version they correspond to
         supabase.table("fpl_data").upsert(
-            {"data_type": "bootstrap-static", "payload": bootstrap_data},
+            {"data_type": "bootstrap-static", "payload": bootstrap_data, "version": version},
             on_conflict="data_type"
         ).execute()
         
         supabase.table("fpl_data").upsert(
-            {"data_type": "fixtures", "payload": fixtures_data},
+            {"data_type": "fixtures", "payload": fixtures_data, "version": version},
             on_conflict="data_type"
         ).execute()
 
+        # Written last: a backend that sees this version can rely on its deltas already being stored
+        supabase.table(VERSIONS_TABLE).upsert({
+            "version": version,
+            "current_gameweek": current_gameweek,
+            "fixtures_hash": current_fixtures_hash,
+            "fixtures_changed": previous is None or previous["fixtures_hash"] != current_fixtures_hash,
+        }, on_conflict="version").execute()
+
         logging.info("✅ Successfully synced FPL data to Supabase.")
 
     except httpx.RequestError as e:
@@ -0,0 +1,137 @@
+# backend/team_service.py
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+import httpx
+from cachetools import TLRUCache
+
+import metrics
+from fpl_client import get_client
+
+if TYPE_CHECKING:
+    from snapshot_service import PlayerRecord
+
+# --- API URLs ---
+FPL_API_ENTRY = "https://fantasy.premierleague.com/api/entry/{team_id}/"
+FPL_API_ENTRY_HISTORY = "https://fantasy.premierleague.com/api/entry/{team_id}/history/"
+FPL_API_TEAM_PICKS = "https://fantasy.premierleague.com/api/entry/{team_id}/event/{gameweek}/picks/"
+
+# Used when no upcoming deadline is known (e.g. end of season)
+FALLBACK_TTL_SECONDS = 15 * 60
+
+# --- Per-Entry Cache ---
+# Entries live until the next gameweek deadline, since picks cannot change before then.
+_deadline_ts: Optional[float] = None
+
+def _expires_at(_key, _value, now: float) -> float:
+    if _deadline_ts is not None and _deadline_ts > now:
+        return _deadline_ts
+    return now + FALLBACK_TTL_SECONDS
+
+_team_cache: TLRUCache = TLRUCache(maxsize=20000, ttu=_expires_at, timer=time.time)
+_in_flight: Dict[Tuple[int, int], asyncio.Future] = {}
+
+def current_deadline() -> Optional[float]:
+    return _deadline_ts
+
+def set_gameweek_deadline(deadline_ts: Optional[float]):
+    """Records the next deadline. Moving to a new deadline invalidates every cached entry."""
+    global _deadline_ts
+    if deadline_ts == _deadline_ts:
+        return
+    if _deadline_ts is not None:
+        logging.info("🧹 Gameweek deadline changed, clearing %s cached team entries.", len(_team_cache))
+    _team_cache.clear()
+    _deadline_ts = deadline_ts
+
+async def get_team_data(team_id: int, gameweek: int, players_by_id: Dict[int, "PlayerRecord"]) -> dict:
+    """
+    Returns the entry summary, history and current picks for a team, joined to the player snapshot.
+    Concurrent requests for the same team share a single upstream fetch.
+    """
+    if players_by_id is None:
+        raise ValueError("Master FPL data is not loaded.")
+
+    key = (team_id, gameweek)
+    cached = _team_cache.get(key)
+    if cached is not None:
+        metrics.CACHE_REQUESTS.inc(cache="team", result="hit")
+        return cached
+
+    future = _in_flight.get(key)
+    if future is not None:
+        metrics.CACHE_REQUESTS.inc(cache="team", result="shared")
+    else:
+        metrics.CACHE_REQUESTS.inc(cache="team", result="miss")
+        future = asyncio.ensure_future(_fetch_team_data(team_id, gameweek, players_by_id))
+        _in_flight[key] = future
+        future.add_done_callback(lambda _: _in_flight.pop(key, None))
+
+    # Shield so a disconnecting client does not cancel the fetch other callers are waiting on
+    return await asyncio.shield(future)
+
+async def _fetch_team_data(team_id: int, gameweek: int, players_by_id: Dict[int, "PlayerRecord"]) -> dict:
+    client = get_client()
+    try:
+        entry_res, history_res, picks_res = await asyncio.gather(
+            client.get(FPL_API_ENTRY.format(team_id=team_id)),
+            client.get(FPL_API_ENTRY_HISTORY.format(team_id=team_id)),
+            client.get(FPL_API_TEAM_PICKS.format(team_id=team_id, gameweek=gameweek)),
+        )
+    except httpx.RequestError as e:
+        raise ConnectionError(f"Could not reach the FPL API: {e}") from e
+
+    if entry_res.status_code == 404:
+        raise ValueError(f"Team ID {team_id} not found.")
+    if entry_res.status_code != 200:
+        raise ConnectionError(f"Could not fetch entry for Team ID {team_id}.")
+
+    if history_res.status_code != 200:
+        raise ConnectionError(f"Could not fetch history for Team ID {team_id} (HTTP {history_res.status_code}).")
+    # Picks 404 before the first deadline of the season; treat only that as an empty squad.
+    # Anything else (503 while the game updates, 429) must not be cached as an empty team.
+    if picks_res.status_code not in (200, 404):
+        raise ConnectionError(f"Could not fetch team picks for Team ID {team_id} (HTTP {picks_res.status_code}).")
+
+    entry = entry_res.json()
+    history = history_res.json()
+    picks_data = picks_res.json() if picks_res.status_code == 200 else {}
+
+    players = []
+    for pick in picks_data.get('picks', []):
+        player = players_by_id.get(pick['element'])
+        if player is None:
+            continue
+        players.append({
+            **player.to_dict(),
+            'squad_position': pick['position'],
+            'multiplier': pick.get('multiplier', 1),
+            'is_captain': pick.get('is_captain', False),
+            'is_vice_captain': pick.get('is_vice_captain', False),
+        })
+
+    gameweek_history = history.get('current', [])
+    latest = gameweek_history[-1] if gameweek_history else {}
+
+    team_data = {
+        "team_id": team_id,
+        "gameweek": gameweek,
+        "team_name": entry.get('name'),
+        "manager_name": f"{entry.get('player_first_name', '')} {entry.get('player_last_name', '')}".strip(),
+        "overall_points": entry.get('summary_overall_points'),
+        "overall_rank": entry.get('summary_overall_rank'),
+        "gameweek_points": entry.get('summary_event_points'),
+        "bank": latest.get('bank', 0) / 10.0,
+        "team_value": latest.get('value', 0) / 10.0,
+        "active_chip": picks_data.get('active_chip'),
+        "chips_used": [chip.get('name') for chip in history.get('chips', [])],
+        "history": [
+            {"gameweek": gw.get('event'), "points": gw.get('points'), "overall_rank": gw.get('overall_rank')}
+            for gw in gameweek_history
+        ],
+        "players": players,
+    }
+    _team_cache[(team_id, gameweek)] = team_data
+    return team_data
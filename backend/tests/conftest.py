@@ -0,0 +1,29 @@
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# Backend modules are imported as top-level modules, the same way main.py imports them
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# main.py and supabase_sync.py validate these at import; tests never reach the real services
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
+
+import benchmarks
+import snapshot_service
+
+@pytest.fixture(scope="session")
+def bootstrap_data():
+    return benchmarks.generate_bootstrap(random.Random(2025))
+
+@pytest.fixture(scope="session")
+def fixtures_data():
+    return benchmarks.generate_fixtures(random.Random(2025))
+
+@pytest.fixture
+def snapshot(bootstrap_data, fixtures_data):
+    return snapshot_service.build_player_snapshot(bootstrap_data, fixtures_data, benchmarks.CURRENT_GAMEWEEK)
@@ -0,0 +1,112 @@
+"""In-memory stand-in for the parts of the Supabase query builder the backend uses."""
+import random
+from collections import defaultdict
+from types import SimpleNamespace
+
+class FakeSupabase:
+    def __init__(self, primary_keys=None, shuffle_ties=True):
+        self.tables = defaultdict(list)
+        # Plain insert() enforces these, like a Postgres primary key would
+        self.primary_keys = primary_keys or {}
+        # Return rows in a random order before sorting, so a non-unique ORDER BY is not silently stable
+        self.shuffle_ties = shuffle_ties
+        self.fail_on = set()
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+class FakeQuery:
+    def __init__(self, db, name):
+        self.db, self.name = db, name
+        self.action, self.payload, self.on_conflict = "select", None, None
+        self.columns = None
+        self.filters, self.orders = [], []
+        self._range = self._limit = None
+        self._single = False
+
+    # --- builders ---
+    def select(self, columns):
+        self.columns = [c.strip() for c in columns.split(",")]
+        return self
+
+    def insert(self, rows):
+        self.action, self.payload = "insert", rows
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.action, self.payload, self.on_conflict = "upsert", rows, on_conflict
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row[column] > value)
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row[column] <= value)
+        return self
+
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self._range = (start, end)
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    # --- execution ---
+    def execute(self):
+        if (self.name, self.action) in self.db.fail_on:
+            self.db.fail_on.discard((self.name, self.action))
+            raise RuntimeError(f"simulated failure on {self.action} {self.name}")
+        rows = self.db.tables[self.name]
+        if self.action == "select":
+            return SimpleNamespace(data=self._select(rows))
+        if self.action == "delete":
+            self.db.tables[self.name] = [row for row in rows if not self._matches(row)]
+            return SimpleNamespace(data=[])
+        new_rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        keys = self.on_conflict.split(",") if self.on_conflict else self.db.primary_keys.get(self.name)
+        for new_row in new_rows:
+            existing = [i for i, row in enumerate(rows) if keys and all(row.get(k) == new_row.get(k) for k in keys)]
+            if existing and self.action == "insert":
+                raise RuntimeError(f"duplicate key value violates unique constraint on {self.name}")
+            if existing:
+                rows[existing[0]] = {**rows[existing[0]], **new_row}
+            else:
+                rows.append(dict(new_row))
+        return SimpleNamespace(data=new_rows)
+
+    def _matches(self, row):
+        return all(f(row) for f in self.filters)
+
+    def _select(self, rows):
+        result = [row for row in rows if self._matches(row)]
+        if self.db.shuffle_ties:
+            random.shuffle(result)
+        for column, desc in reversed(self.orders):
+            result.sort(key=lambda row: row[column], reverse=desc)
+        if self._range:
+            result = result[self._range[0]:self._range[1] + 1]
+        if self._limit is not None:
+            result = result[:self._limit]
+        if self.columns and self.columns != ["*"]:
+            result = [{c: row.get(c) for c in self.columns} for row in result]
+        if self._single:
+            return result[0] if result else None
+        return result
@@ -0,0 +1,183 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import admission_service
+from admission_service import AdmissionController, InMemoryBucketStore, RateLimitExceeded, RedisBucketStore
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Replaces only admission_service's view of `time`; the event loop keeps the real clock
+    fake = FakeClock()
+    monkeypatch.setattr(admission_service, "time", SimpleNamespace(monotonic=lambda: fake.now, time=lambda: fake.now))
+    return fake
+
+class FakeRedis:
+    """Runs the token-bucket script's logic in Python against an in-memory hash per key."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    async def eval(self, script, numkeys, key, rate, capacity, now):
+        assert script == admission_service._TOKEN_BUCKET_LUA and numkeys == 1
+        state = self.hashes.get(key, {})
+        tokens = float(state.get('tokens', capacity))
+        ts = float(state.get('ts', now))
+        tokens = min(capacity, tokens + max(0, now - ts) * rate)
+        allowed = 0
+        if tokens >= 1:
+            tokens -= 1
+            allowed = 1
+        self.hashes[key] = {'tokens': str(tokens), 'ts': str(now)}
+        return [allowed, str(tokens)]
+
+# --- Token buckets ---
+
+@pytest.mark.parametrize("make_store", [InMemoryBucketStore, lambda: RedisBucketStore(FakeRedis())], ids=["memory", "redis"])
+def test_bucket_allows_burst_then_refills_at_rate(clock, make_store):
+    store = make_store()
+
+    async def scenario():
+        results = [await store.consume("ip:1", 1.0, 2) for _ in range(3)]
+        clock.advance(0.5)
+        results.append(await store.consume("ip:1", 1.0, 2))
+        clock.advance(0.5)
+        results.append(await store.consume("ip:1", 1.0, 2))
+        results.append(await store.consume("ip:2", 1.0, 2))
+        return results
+
+    assert asyncio.run(scenario()) == pytest.approx([0.0, 0.0, 1.0, 0.5, 0.0, 0.0])
+
+def test_redis_store_shares_buckets_under_a_prefix(clock):
+    redis = FakeRedis()
+    workers = [RedisBucketStore(redis, prefix="test:"), RedisBucketStore(redis, prefix="test:")]
+
+    async def scenario():
+        return [await workers[i % 2].consume("ip:1", 1.0, 2) for i in range(3)]
+
+    assert asyncio.run(scenario()) == pytest.approx([0.0, 0.0, 1.0])
+    assert list(redis.hashes) == ["test:ip:1"]
+
+def test_check_rate_limits_raises_with_retry_after_and_fails_open(clock, monkeypatch):
+    monkeypatch.setattr(admission_service, "bucket_store", InMemoryBucketStore())
+    monkeypatch.setattr(admission_service, "IP_BURST", 1)
+
+    asyncio.run(admission_service.check_rate_limits("1.2.3.4"))
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        asyncio.run(admission_service.check_rate_limits("1.2.3.4"))
+    assert excinfo.value.retry_after == pytest.approx(60 / admission_service.IP_RATE_PER_MINUTE)
+
+    class BrokenStore:
+        async def consume(self, *args):
+            raise ConnectionError("redis down")
+
+    admission_service.set_bucket_store(BrokenStore())
+    asyncio.run(admission_service.check_rate_limits("1.2.3.4"))
+
+def test_client_ip_counts_trusted_hops_from_the_right():
+    client = SimpleNamespace(host="10.0.0.1")
+    headers = {"x-forwarded-for": "6.6.6.6, 203.0.113.7, 198.51.100.2"}
+    assert admission_service.client_ip(headers, client, trusted_hops=1) == "198.51.100.2"
+    # Behind a CDN and a load balancer the CDN's own address is the last hop
+    assert admission_service.client_ip(headers, client, trusted_hops=2) == "203.0.113.7"
+    assert admission_service.client_ip({"x-forwarded-for": "203.0.113.7"}, client, trusted_hops=2) == "203.0.113.7"
+    # uvicorn --proxy-headers has already resolved the client into the socket peer
+    assert admission_service.client_ip(headers, client, trusted_hops=0) == "10.0.0.1"
+    assert admission_service.client_ip({}, client) == "10.0.0.1"
+    assert admission_service.client_ip({}, None) == "unknown"
+
+# --- Admission controller ---
+
+def test_queue_full_is_rejected():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=5)
+        slot = await controller.acquire()
+        waiting = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(RateLimitExceeded):
+            await controller.acquire()
+        slot.release()
+        (await waiting).release()
+        return controller.active, controller.queue_depth
+
+    assert asyncio.run(scenario()) == (0, 0)
+
+def test_queue_timeout_is_rejected_and_leaves_the_queue():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=0.01)
+        slot = await controller.acquire()
+        with pytest.raises(RateLimitExceeded):
+            await controller.acquire()
+        depth = controller.queue_depth
+        slot.release()
+        return depth, controller.active
+
+    assert asyncio.run(scenario()) == (0, 0)
+
+def test_timeout_after_handoff_passes_the_slot_on(monkeypatch):
+    real_wait_for = asyncio.wait_for
+
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=5)
+        held = await controller.acquire()
+
+        async def slot_arrives_as_timeout_fires(future, timeout):
+            # The holder releases (handing this waiter the slot) just before wait_for gives up
+            monkeypatch.setattr(admission_service.asyncio, "wait_for", real_wait_for)
+            held.release()
+            raise asyncio.TimeoutError
+
+        monkeypatch.setattr(admission_service.asyncio, "wait_for", slot_arrives_as_timeout_fires)
+        with pytest.raises(RateLimitExceeded):
+            await controller.acquire()
+        return controller.active, controller.queue_depth
+
+    assert asyncio.run(scenario()) == (0, 0)
+
+def test_release_hands_the_slot_to_the_oldest_waiter():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=5)
+        slot = await controller.acquire()
+        first = asyncio.create_task(controller.acquire())
+        second = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+
+        slot.release()
+        first_slot = await first
+        # The slot moved straight to the first waiter; nothing was freed in between
+        assert controller.active == 1 and not second.done()
+
+        first_slot.release()
+        (await second).release()
+        return controller.active, controller.queue_depth
+
+    assert asyncio.run(scenario()) == (0, 0)
+
+def test_double_release_frees_one_slot():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=5)
+        slot = await controller.acquire()
+        first = asyncio.create_task(controller.acquire())
+        second = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+
+        slot.release()
+        slot.release()
+        # Only one waiter may be admitted per real release
+        assert controller.queue_depth == 1
+        await asyncio.sleep(0.01)
+        assert first.done() and not second.done()
+
+        (await first).release()
+        (await second).release()
+        return controller.active
+
+    assert asyncio.run(scenario()) == 0
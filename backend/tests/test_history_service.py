@@ -0,0 +1,62 @@
+import pytest
+
+import context_service
+from history_service import HistoricalStats
+
+def _season(cost, points, minutes, goals=0, assists=0):
+    return {'cost': cost, 'total_points': points, 'minutes_played': minutes, 'goals_scored': goals, 'assists': assists}
+
+RAW = {
+    'Seamus Coleman': {'2022-23': _season(4.1, 63, 1650), '2023-24': _season(4.4, 30, 660)},
+    'Séamus Coleman': {'2024-25': _season(4.3, 3, 120)},
+    'Martin Ødegaard': {'2023-24': _season(8.5, 212, 3100), '2024-25': _season(8.5, 150, 2200)},
+    'Bench Warmer': {'2024-25': _season(4.0, 8, 90)},
+    'Cheap Keeper': {'2024-25': _season(4.0, 140, 3420)},
+}
+
+@pytest.fixture
+def history():
+    return HistoricalStats(RAW)
+
+def test_spellings_of_one_player_share_a_row(history):
+    row = history.row_for('Seamus Coleman')
+    assert row == history.row_for('Séamus Coleman') == history.row_for('SEAMUS  coleman')
+    assert history.names[row] == 'Séamus Coleman'
+    assert len(history.names) == 4
+    assert history.stats['total_points'][row].tolist() == [63, 30, 3]
+    # Season-over-season changes span the two spellings
+    assert history.points_change[row, 2] == -27
+
+def test_row_for_tries_each_name_in_turn(history):
+    assert history.row_for('Unknown Player', 'Martin Odegaard') == history.row_for('Martin Ødegaard')
+    assert history.row_for('Unknown Player', '') is None
+
+def test_describe_lists_each_season_with_rates(history):
+    summary = history.describe(history.row_for('Martin Odegaard'))
+    assert summary.startswith('2023-24: 212 pts, £8.5m, 24.9 pts/£m, 6.15 pts/90;')
+    assert '2024-25: 150 pts' in summary and '(-62 pts, +0.0m vs prior)' in summary
+    # Seasons without data are skipped rather than printed as NaN
+    assert '2022-23' not in summary
+
+def test_top_players_ranks_the_latest_season_and_skips_small_samples(history):
+    leaders = history.top_players('points_per_90')
+    names = [leader['name'] for leader in leaders]
+    # Coleman and the bench player are under the minutes threshold for per-90 rates
+    assert names == ['Martin Ødegaard', 'Cheap Keeper']
+    assert leaders[0] == {'name': 'Martin Ødegaard', 'season': '2024-25', 'points_per_90': round(150 / 2200 * 90, 2)}
+    assert [leader['name'] for leader in history.top_players('points_per_million', season='2023-24', n=1)] == ['Martin Ødegaard']
+
+@pytest.mark.parametrize("question, heading, first_line", [
+    ("Who had the best points per 90 last season?", "Top 2 players by points per 90 (2024-25):", "- Martin Ødegaard: 6.14 pts/90"),
+    ("Which players improved the most last season?", "Top 2 players by points gained (2024-25):", "- Séamus Coleman: -27 pts vs prior season"),
+    ("Best picks from the previous season?", "Top 4 players by points per million (2024-25):", "- Cheap Keeper: 35.0 pts/£m"),
+])
+def test_past_season_intent_lists_leaders(monkeypatch, snapshot, history, question, heading, first_line):
+    monkeypatch.setattr(context_service, "get_historical_stats", lambda: history)
+    lines = context_service.build_context_for_question(question, snapshot).splitlines()
+    assert lines[0] == heading
+    assert lines[1] == first_line
+
+def test_past_season_intent_without_history(monkeypatch, snapshot):
+    monkeypatch.setattr(context_service, "get_historical_stats", lambda: None)
+    assert context_service.build_context_for_question("Who had the best points per 90 last season?", snapshot) == ""
@@ -0,0 +1,193 @@
+import asyncio
+import copy
+import json
+from functools import partial
+
+import httpx
+import pytest
+
+import main
+import snapshot_service
+import supabase_sync
+import team_service
+from fake_supabase import FakeSupabase
+
+PRIMARY_KEYS = {
+    supabase_sync.DELTAS_TABLE: ["version", "player_id"],
+    supabase_sync.PRICE_HISTORY_TABLE: ["version", "player_id"],
+    supabase_sync.VERSIONS_TABLE: ["version"],
+    "fpl_data": ["data_type"],
+}
+
+# --- diff_players / fixtures_signature ---
+
+def test_diff_players_reports_only_changed_tracked_fields():
+    previous = [{'id': 1, 'now_cost': 55, 'form': '3.0', 'bps': 10}, {'id': 2, 'now_cost': 60, 'form': '1.0'}]
+    current = [{'id': 1, 'now_cost': 56, 'form': '3.0', 'bps': 14}, {'id': 2, 'now_cost': 60, 'form': '1.0'},
+               {'id': 3, 'now_cost': 45, 'form': '0.0'}]
+
+    deltas = supabase_sync.diff_players(previous, current)
+
+    # bps is not tracked, player 2 is unchanged, player 3 is new and gets every tracked field
+    assert deltas[1] == {'now_cost': 56}
+    assert 2 not in deltas
+    assert set(deltas[3]) == set(supabase_sync.DELTA_FIELDS)
+
+def test_fixtures_signature_tracks_only_fields_the_backend_uses(fixtures_data):
+    signature = supabase_sync.fixtures_signature(fixtures_data)
+    assert supabase_sync.fixtures_signature(list(reversed(fixtures_data))) == signature
+
+    scored = copy.deepcopy(fixtures_data)
+    scored[0].update(team_h_score=2, team_a_score=1, kickoff_time="2025-01-01T12:30:00Z")
+    assert supabase_sync.fixtures_signature(scored) == signature
+
+    rescheduled = copy.deepcopy(fixtures_data)
+    rescheduled[0]['event'] = 38 if rescheduled[0]['event'] != 38 else 37
+    assert supabase_sync.fixtures_signature(rescheduled) != signature
+
+# --- apply_player_deltas ---
+
+def test_apply_player_deltas_keeps_latest_value_per_field(snapshot):
+    player_id = int(snapshot['id'].iloc[0])
+    original_cost = snapshot['now_cost'].iloc[0]
+    deltas = [
+        {'version': 2, 'player_id': player_id, 'changes': {'now_cost': 71, 'status': 'i', 'selected_by_percent': '9.9'}},
+        {'version': 3, 'player_id': player_id, 'changes': {'now_cost': 72, 'status': 'brand-new-status'}},
+    ]
+
+    updated = snapshot_service.apply_player_deltas(snapshot, deltas)
+
+    row = updated.set_index('id').loc[player_id]
+    assert row['now_cost'] == 72
+    assert row['status'] == 'brand-new-status'
+    assert updated['now_cost'].dtype == snapshot['now_cost'].dtype
+    # The input frame is never modified in place
+    assert snapshot['now_cost'].iloc[0] == original_cost
+
+def test_apply_player_deltas_returns_none_for_unknown_player(snapshot):
+    unknown_id = int(snapshot['id'].max()) + 1
+    assert snapshot_service.apply_player_deltas(snapshot, [{'player_id': unknown_id, 'changes': {'now_cost': 50}}]) is None
+
+@pytest.mark.parametrize("field, value", [('team', 3), ('element_type', 4), ('web_name', 'Renamed')])
+def test_apply_player_deltas_returns_none_when_a_rebuild_field_changes(snapshot, field, value):
+    player_id = int(snapshot['id'].iloc[0])
+    assert snapshot_service.apply_player_deltas(snapshot, [{'player_id': player_id, 'changes': {'now_cost': 50, field: value}}]) is None
+
+# --- sync_fpl_data_to_supabase ---
+
+def _run_sync(monkeypatch, fake, bootstrap, fixtures):
+    def handler(request):
+        payload = bootstrap if request.url == supabase_sync.FPL_API_BOOTSTRAP else fixtures
+        return httpx.Response(200, content=json.dumps(payload))
+
+    monkeypatch.setattr(supabase_sync, "create_client", lambda url, key: fake)
+    monkeypatch.setattr(supabase_sync.httpx, "AsyncClient", partial(httpx.AsyncClient, transport=httpx.MockTransport(handler)))
+    asyncio.run(supabase_sync.sync_fpl_data_to_supabase())
+
+def test_sync_writes_versioned_deltas_and_survives_a_retry(monkeypatch, bootstrap_data, fixtures_data):
+    fake = FakeSupabase(primary_keys=PRIMARY_KEYS)
+    _run_sync(monkeypatch, fake, bootstrap_data, fixtures_data)
+    assert [v['version'] for v in fake.tables[supabase_sync.VERSIONS_TABLE]] == [1]
+
+    changed = copy.deepcopy(bootstrap_data)
+    changed['elements'][0]['now_cost'] += 1
+    changed['elements'][1]['form'] = '9.9'
+
+    # The first attempt dies after writing deltas but before the versions row
+    fake.fail_on.add(("fpl_data", "upsert"))
+    _run_sync(monkeypatch, fake, changed, fixtures_data)
+    assert [v['version'] for v in fake.tables[supabase_sync.VERSIONS_TABLE]] == [1]
+
+    _run_sync(monkeypatch, fake, changed, fixtures_data)
+
+    versions = fake.tables[supabase_sync.VERSIONS_TABLE]
+    assert [v['version'] for v in versions] == [1, 2]
+    assert versions[-1]['fixtures_changed'] is False
+    deltas = fake.tables[supabase_sync.DELTAS_TABLE]
+    assert sorted(d['player_id'] for d in deltas) == [changed['elements'][0]['id'], changed['elements'][1]['id']]
+    price_rows = fake.tables[supabase_sync.PRICE_HISTORY_TABLE]
+    assert [(p['old_cost'], p['new_cost']) for p in price_rows] == [(bootstrap_data['elements'][0]['now_cost'], changed['elements'][0]['now_cost'])]
+
+# --- apply_incremental_update ---
+
+# Module state apply_snapshot_state() replaces; saved through monkeypatch so each test's load is undone
+MAIN_STATE = ('master_fpl_data', 'current_gameweek_id', 'is_game_live', 'teams_data_store', 'players_by_id',
+              'data_loaded_at', 'data_version', 'startup_phase')
+
+@pytest.fixture
+def backend(monkeypatch, snapshot):
+    """main.py loaded at version 1 of gameweek 10, reading from a fake Supabase."""
+    for name in MAIN_STATE:
+        monkeypatch.setattr(main, name, getattr(main, name))
+    monkeypatch.setattr(team_service, "_deadline_ts", team_service._deadline_ts)
+    fake = FakeSupabase(primary_keys=PRIMARY_KEYS)
+    monkeypatch.setattr(main, "supabase", fake)
+    monkeypatch.setattr(main, "worker_role", "standalone")
+    main.apply_snapshot_state({
+        "master_fpl_data": snapshot, "teams": [], "current_gameweek_id": 10, "is_game_live": False,
+        "next_deadline_ts": None, "loaded_at": 0.0, "version": 1,
+    })
+    return fake
+
+def _add_version(fake, version, gameweek=10, fixtures_changed=False, deltas=()):
+    fake.tables[supabase_sync.VERSIONS_TABLE].append(
+        {"version": version, "current_gameweek": gameweek, "fixtures_hash": "x", "fixtures_changed": fixtures_changed})
+    fake.tables[supabase_sync.DELTAS_TABLE].extend(
+        {"version": version, "player_id": player_id, "changes": changes} for player_id, changes in deltas)
+
+def test_incremental_update_applies_contiguous_versions(backend, snapshot):
+    player_id = int(snapshot['id'].iloc[0])
+    _add_version(backend, 2, deltas=[(player_id, {'now_cost': 80})])
+    _add_version(backend, 3, deltas=[(player_id, {'now_cost': 81})])
+
+    assert asyncio.run(main.apply_incremental_update()) is True
+    assert main.data_version == 3
+    assert main.players_by_id[player_id].now_cost == 81
+
+def test_incremental_update_ignores_deltas_of_an_unfinished_sync(backend, snapshot):
+    player_id = int(snapshot['id'].iloc[0])
+    _add_version(backend, 2, deltas=[(player_id, {'now_cost': 80})])
+    # Version 3's deltas are written, but its versions row is not yet
+    backend.tables[supabase_sync.DELTAS_TABLE].append({"version": 3, "player_id": player_id, "changes": {'now_cost': 99}})
+
+    assert asyncio.run(main.apply_incremental_update()) is True
+    assert main.data_version == 2
+    assert main.players_by_id[player_id].now_cost == 80
+
+def test_incremental_update_is_a_no_op_without_new_versions(backend, snapshot):
+    assert asyncio.run(main.apply_incremental_update()) is True
+    assert main.data_version == 1
+    assert main.master_fpl_data is snapshot
+
+@pytest.mark.parametrize("version, gameweek, fixtures_changed", [
+    (3, 10, False),   # version 2 is missing
+    (2, 11, False),   # gameweek rollover
+    (2, 10, True),    # fixtures changed
+])
+def test_incremental_update_requires_full_reload(backend, snapshot, version, gameweek, fixtures_changed):
+    _add_version(backend, version, gameweek=gameweek, fixtures_changed=fixtures_changed,
+                 deltas=[(int(snapshot['id'].iloc[0]), {'now_cost': 80})])
+
+    assert asyncio.run(main.apply_incremental_update()) is False
+    assert main.data_version == 1
+
+@pytest.mark.parametrize("player_id, changes", [
+    (10_000, {'now_cost': 80}),   # unknown player
+    (None, {'team': 3}),          # mid-season transfer
+])
+def test_incremental_update_requires_full_reload_for_player_changes(backend, snapshot, player_id, changes):
+    _add_version(backend, 2, deltas=[(player_id or int(snapshot['id'].iloc[0]), changes)])
+
+    assert asyncio.run(main.apply_incremental_update()) is False
+    assert main.data_version == 1
+
+def test_deltas_are_paged_on_a_unique_key(backend, snapshot):
+    # Three versions of every player overflow the 1000-row page; the fake returns ties in random order
+    player_ids = [int(i) for i in snapshot['id']]
+    for version in (2, 3, 4):
+        _add_version(backend, version, deltas=[(player_id, {'now_cost': 40 + version}) for player_id in player_ids])
+
+    versions, deltas = main._fetch_updates_since(1)
+
+    assert len(versions) == 3
+    assert len({(d['version'], d['player_id']) for d in deltas}) == len(deltas) == 3 * len(player_ids)
@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import live_push_service
+import main
+
+@pytest.fixture
+def live_api(monkeypatch):
+    """Serves queued per-gameweek responses from the live endpoint; an exhausted queue repeats its last entry."""
+    responses = {}
+
+    def handler(request):
+        gameweek = int(request.url.path.rstrip('/').split('/')[-2])
+        queue = responses[gameweek]
+        body = queue.pop(0) if len(queue) > 1 else queue[0]
+        if isinstance(body, str):
+            return httpx.Response(200, content=body)
+        return httpx.Response(200, content=json.dumps({'elements': [{'id': pid, 'stats': {'total_points': pts}} for pid, pts in body.items()]}))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(live_push_service, "get_client", lambda: client)
+    monkeypatch.setattr(live_push_service, "LIVE_POLL_SECONDS", 0.01)
+    monkeypatch.setattr(live_push_service, "broadcasters", {})
+    return responses
+
+async def _next_points(stream):
+    while True:
+        message = await asyncio.wait_for(stream.__anext__(), 1)
+        if message.startswith("event: points"):
+            return json.loads(message.split("data: ", 1)[1])
+
+def test_poll_loop_survives_a_malformed_response(live_api):
+    live_api[10] = ["not json", {1: 5}]
+
+    async def scenario():
+        stream = live_push_service.stream_live_points(10, [1])
+        try:
+            return await _next_points(stream)
+        finally:
+            await stream.aclose()
+
+    assert asyncio.run(scenario()) == {"gameweek": 10, "players": {"1": 5}}
+
+def test_gameweeks_have_separate_pollers_and_points(live_api):
+    live_api[10] = [{1: 5}]
+    live_api[11] = [{1: 0}]
+
+    async def scenario():
+        old_stream = live_push_service.stream_live_points(10, [1])
+        old_update = await _next_points(old_stream)
+        new_stream = live_push_service.stream_live_points(11, [1])
+        new_update = await _next_points(new_stream)
+        live_api[10] = [{1: 7}]
+        later_old_update = await _next_points(old_stream)
+        await old_stream.aclose()
+        await new_stream.aclose()
+        return old_update, new_update, later_old_update
+
+    old_update, new_update, later_old_update = asyncio.run(scenario())
+    assert old_update == {"gameweek": 10, "players": {"1": 5}}
+    assert new_update == {"gameweek": 11, "players": {"1": 0}}
+    assert later_old_update == {"gameweek": 10, "players": {"1": 7}}
+
+def test_stream_endpoint_404s_for_a_team_without_picks(monkeypatch, snapshot):
+    from fastapi.testclient import TestClient
+
+    async def team_without_picks(team_id, gameweek, players_by_id):
+        return {'team_id': team_id, 'players': []}
+
+    monkeypatch.setattr(main, "master_fpl_data", snapshot)
+    monkeypatch.setattr(main.team_service, "get_team_data", team_without_picks)
+
+    # Not used as a context manager, so the app's startup (data load, scheduler) does not run
+    response = TestClient(main.app).get("/api/live-gameweek-stream/1234")
+
+    assert response.status_code == 404
+    assert "no picks" in response.json()['detail']
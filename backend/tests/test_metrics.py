@@ -0,0 +1,36 @@
+import pytest
+
+import metrics
+
+@pytest.fixture
+def histogram():
+    histogram = metrics.Histogram("test_duration_seconds", "Test histogram.", ["function"])
+    yield histogram
+    metrics._registry.remove(histogram)
+
+def test_histogram_renders_cumulative_buckets(histogram):
+    histogram.observe(0.003, function="a")
+    histogram.observe(0.2, function="a")
+
+    lines = histogram.render()
+
+    assert 'test_duration_seconds_bucket{function="a",le="0.005"} 1' in lines
+    assert 'test_duration_seconds_bucket{function="a",le="0.25"} 2' in lines
+    assert 'test_duration_seconds_bucket{function="a",le="+Inf"} 2' in lines
+    assert 'test_duration_seconds_count{function="a"} 2' in lines
+
+def test_counter_and_gauge_render_every_series():
+    counter = metrics.Counter("test_requests_total", "Test counter.", ["result"])
+    gauge = metrics.Gauge("test_depth", "Test gauge.")
+    try:
+        counter.inc(result="hit")
+        counter.inc(2, result="miss")
+        gauge.set_function(lambda: 3)
+        text = metrics.render()
+    finally:
+        metrics._registry.remove(counter)
+        metrics._registry.remove(gauge)
+
+    assert 'test_requests_total{result="hit"} 1.0' in text
+    assert 'test_requests_total{result="miss"} 2.0' in text
+    assert "test_depth 3" in text
@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+import benchmarks
+import chip_service
+import snapshot_service
+from context_service import build_context_for_question
+from draft_service import DraftEngine
+
+@pytest.fixture
+def shared(tmp_path, monkeypatch):
+    import shared_snapshot
+    snapshot_dir = tmp_path / "fpl-chatbot"
+    monkeypatch.setattr(shared_snapshot, "SNAPSHOT_DIR", snapshot_dir)
+    monkeypatch.setattr(shared_snapshot, "SNAPSHOT_PATH", snapshot_dir / "snapshot.bin")
+    monkeypatch.setattr(shared_snapshot, "LOCK_PATH", snapshot_dir / "leader.lock")
+    return shared_snapshot
+
+def test_publish_attach_round_trip_serves_every_read_path(shared, snapshot, bootstrap_data):
+    shared.publish({"master_fpl_data": snapshot, "teams": bootstrap_data['teams']})
+    version, state = shared.attach()
+    attached = state["master_fpl_data"]
+
+    assert version == shared.snapshot_version()
+    assert attached.equals(snapshot)
+    # Numeric columns are mapped straight from the file, not copied
+    assert not attached['now_cost'].to_numpy().flags.writeable
+
+    players_by_id = snapshot_service.build_players_by_id(attached)
+    gameweek = benchmarks.CURRENT_GAMEWEEK
+    assert build_context_for_question("Which midfielder should I buy for 8.5m?", attached, players_by_id).startswith("Top transfer candidates")
+    assert build_context_for_question("Who are the most undervalued players?", attached, players_by_id).startswith("Top 10 best value")
+    assert build_context_for_question(f"Is {attached.index[0]} worth it?", attached, players_by_id).startswith("Player Data")
+    assert chip_service.get_fixture_difficulty_for_next_n_gameweeks(attached, gameweek)
+    assert chip_service.get_adjusted_fixture_difficulty(attached, state["teams"], gameweek)
+    assert chip_service.calculate_chip_recommendations_new(attached, gameweek)["status"] == "success"
+    for strategy in ('balanced', 'stars_and_scrubs'):
+        assert DraftEngine(attached).create_draft(strategy).equals(DraftEngine(snapshot).create_draft(strategy))
+    assert snapshot_service.apply_player_deltas(attached, [{'player_id': int(attached['id'].iloc[0]), 'changes': {'now_cost': 50}}]) is not None
+
+def test_attach_without_snapshot_returns_none(shared):
+    assert shared.attach() is None
+
+def test_refuses_directory_accessible_to_others(shared):
+    shared.SNAPSHOT_DIR.mkdir(mode=0o755)
+    os.chmod(shared.SNAPSHOT_DIR, 0o755)
+    with pytest.raises(PermissionError):
+        shared.attach()
@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import snapshot_service
+import team_service
+
+TEAM_ID = 1234
+
+@pytest.fixture
+def players_by_id(snapshot):
+    return snapshot_service.build_players_by_id(snapshot)
+
+@pytest.fixture
+def fpl_api(monkeypatch, players_by_id):
+    """Mock entry, history and picks endpoints. Set `api.status[endpoint]` to make one fail; `api.calls` counts requests."""
+    player_ids = list(players_by_id)[:15]
+    api = type("FplApi", (), {})()
+    api.calls = 0
+    api.status = {'entry': 200, 'history': 200, 'picks': 200}
+    bodies = {
+        'entry': {'name': 'Synthetic XI', 'player_first_name': 'Ada', 'player_last_name': 'Lovelace', 'summary_overall_points': 612},
+        'history': {'current': [{'event': 9, 'points': 55, 'overall_rank': 1000, 'bank': 15, 'value': 1012}], 'chips': [{'name': 'wildcard'}]},
+        'picks': {'active_chip': None, 'picks': [{'element': pid, 'position': i + 1, 'is_captain': i == 0} for i, pid in enumerate(player_ids)]},
+    }
+
+    async def handler(request):
+        api.calls += 1
+        # Long enough for every concurrent caller to find the fetch in flight
+        await asyncio.sleep(0.01)
+        path = request.url.path
+        endpoint = 'picks' if '/picks/' in path else 'history' if path.endswith('/history/') else 'entry'
+        if api.status[endpoint] == 'unreachable':
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(api.status[endpoint], content=json.dumps(bodies[endpoint]))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(team_service, "get_client", lambda: client)
+    monkeypatch.setattr(team_service, "_deadline_ts", None)
+    team_service._team_cache.clear()
+    yield api
+    team_service._team_cache.clear()
+
+def _get(players_by_id, gameweek=10):
+    return team_service.get_team_data(TEAM_ID, gameweek, players_by_id)
+
+def test_concurrent_requests_share_one_upstream_fetch(fpl_api, players_by_id):
+    async def scenario():
+        results = await asyncio.gather(*(_get(players_by_id) for _ in range(20)))
+        cached = await _get(players_by_id)
+        return results, cached
+
+    results, cached = asyncio.run(scenario())
+
+    # One entry, one history and one picks request for all 21 callers
+    assert fpl_api.calls == 3
+    assert all(result is results[0] for result in results) and cached is results[0]
+    team = results[0]
+    assert team['team_name'] == 'Synthetic XI' and team['manager_name'] == 'Ada Lovelace'
+    assert team['bank'] == 1.5 and team['chips_used'] == ['wildcard']
+    assert len(team['players']) == 15 and team['players'][0]['is_captain'] is True
+    assert not team_service._in_flight
+
+def test_a_new_deadline_clears_the_cache(fpl_api, players_by_id):
+    team_service.set_gameweek_deadline(2_000_000_000.0)
+    asyncio.run(_get(players_by_id))
+    team_service.set_gameweek_deadline(2_000_000_000.0)
+    asyncio.run(_get(players_by_id))
+    assert fpl_api.calls == 3
+
+    team_service.set_gameweek_deadline(2_000_600_000.0)
+    asyncio.run(_get(players_by_id))
+    assert fpl_api.calls == 6
+
+def test_unknown_team_raises_value_error(fpl_api, players_by_id):
+    fpl_api.status['entry'] = 404
+    with pytest.raises(ValueError, match="not found"):
+        asyncio.run(_get(players_by_id))
+
+def test_picks_404_is_an_empty_squad(fpl_api, players_by_id):
+    fpl_api.status['picks'] = 404
+    team = asyncio.run(_get(players_by_id))
+    assert team['players'] == [] and team['active_chip'] is None
+
+@pytest.mark.parametrize("endpoint, status", [
+    ('entry', 503), ('history', 500), ('history', 404), ('picks', 503), ('picks', 429), ('picks', 'unreachable'),
+])
+def test_upstream_failures_raise_and_are_not_cached(fpl_api, players_by_id, endpoint, status):
+    fpl_api.status[endpoint] = status
+    with pytest.raises(ConnectionError):
+        asyncio.run(_get(players_by_id))
+    assert not team_service._team_cache
+
+    # Once the API recovers, the next request fetches the full team
+    fpl_api.status[endpoint] = 200
+    assert len(asyncio.run(_get(players_by_id))['players']) == 15